@@ -1,20 +1,67 @@
 #!/usr/bin/env python3
 
-from .__main__ import (
-    HOME,
-    KERNEL_TYPE,
-    FilePath,
-    FileReader,
-    FileJson,
-    mkdir,
-    touch,
-    ConfDirs,
-    AppDirs,
-    get_abspath,
-    __version__,
-    __repo__,
-)
-
-
-if KERNEL_TYPE == 'Linux':
-    from .__main__ import (add_home_in_path)
+"""
+   Os nomes públicos são importados sob demanda (PEP 562), "import apps_conf"
+não executa apps_conf/__main__.py até que um dos nomes abaixo seja usado.
+"""
+
+# Nome público -> submódulo onde ele está definido.
+_LAZY_NAMES = {
+    'HOME': '__main__',
+    'KERNEL_TYPE': '__main__',
+    'FilePath': '__main__',
+    'FilePathSet': '__main__',
+    'FileStat': '__main__',
+    'FileReader': '__main__',
+    'FileJson': '__main__',
+    'FileLock': '__main__',
+    'JsonSerializer': '__main__',
+    'mkdir': '__main__',
+    'touch': '__main__',
+    'provision_dirs': '__main__',
+    'ProvisionReport': '__main__',
+    'ConfDirs': '__main__',
+    'DirsSnapshot': '__main__',
+    'AppDirs': '__main__',
+    'get_abspath': '__main__',
+    'get_nested': '__main__',
+    'set_nested': '__main__',
+    'add_home_in_path': '__main__',
+    '__version__': '__main__',
+    '__repo__': '__main__',
+    'stats': 'instrumentation',
+    'AsyncFileReader': 'aio',
+    'AsyncFileJson': 'aio',
+    'RcEditor': 'rcfile',
+    'TempWorkspace': 'workspace',
+    'AppCache': 'cache',
+    'IconIndex': 'icons',
+    'AppRegistry': 'registry',
+    'FileWatcher': 'watcher',
+    'get_default_watcher': 'watcher',
+}
+
+__all__ = [
+    name for name in _LAZY_NAMES
+    if (not name.startswith('__')) and ((name != 'add_home_in_path') or __import__('sys').platform.startswith('linux'))
+]
+
+
+def __getattr__(name: str):
+    if not name in _LAZY_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    from importlib import import_module
+
+    module = import_module(f'.{_LAZY_NAMES[name]}', __name__)
+    if (name == 'add_home_in_path') and (module.KERNEL_TYPE != 'Linux'):
+        # add_home_in_path() só existe em sistemas Linux.
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -12,10 +12,18 @@ __author__ = 'Bruno Chaves'
 __repo__ = 'https://gitlab.com/bschaves/apps-conf'
 __online_file__ = 'https://gitlab.com/bschaves/apps-conf/-/archive/main/apps-conf-main.zip'
 
-from platform import system
-from shutil import copyfile
-import json
-from tempfile import NamedTemporaryFile, TemporaryDirectory
+# Módulos mais pesados da biblioteca padrão (json, re, pathlib, tempfile, shutil,
+# concurrent.futures ...) são importados apenas nas funções que os usam, para que
+# "import apps_conf" seja rápido.
+from contextlib import contextmanager, nullcontext
+import struct
+from stat import S_ISDIR
+import sys
+import time
+from array import array
+from errno import ENOTDIR
+from collections import namedtuple
+from collections.abc import Mapping
 import os.path
 from os import (
     makedirs,
@@ -24,11 +32,52 @@ from os import (
     remove,
 )
 
-from pathlib import Path
+try:
+    from . import instrumentation as _instrumentation
+    from .instrumentation import instrumented, instrumented_generator
+except ImportError:
+    # Executado como script (python3 apps_conf/__main__.py), sem o pacote apps_conf,
+    # o diretório deste arquivo está no início de sys.path.
+    import instrumentation as _instrumentation
+    from instrumentation import instrumented, instrumented_generator
 
-HOME = os.path.abspath(Path().home())
-KERNEL_TYPE = system()
-del  system
+try:
+    import fcntl
+except ImportError:
+    # Windows, FileLock não bloqueia nada.
+    fcntl = None
+
+
+# Tipos imutáveis de um documento json, não precisam ser copiados.
+_JSON_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def _json_copy(value):
+    """
+       Cópia profunda de um valor json (dict, list e tipos simples), várias vezes
+    mais rápida que copy.deepcopy(). Outros tipos são copiados com copy.deepcopy().
+    """
+    _type = type(value)
+    if _type is dict:
+        return {k: (v if type(v) in _JSON_SCALARS else _json_copy(v)) for k, v in value.items()}
+    if _type is list:
+        return [v if type(v) in _JSON_SCALARS else _json_copy(v) for v in value]
+    if _type in _JSON_SCALARS:
+        return value
+    from copy import deepcopy
+
+    return deepcopy(value)
+
+
+def _kernel_type() -> str:
+    """Equivalente a platform.system(), sem importar o módulo platform."""
+    if sys.platform.startswith('win'):
+        return 'Windows'
+    return os.uname().sysname
+
+
+HOME = os.path.abspath(os.path.expanduser('~'))
+KERNEL_TYPE = _kernel_type()
 
 
 def mkdir(path: str) -> bool:
@@ -48,12 +97,120 @@ def mkdir(path: str) -> bool:
         return True
 
 
+class ProvisionReport(object):
+    """
+       Resultado de provision_dirs()/AppDirs.create_dirs().
+
+    created  - Diretórios criados.
+    existing - Diretórios que já existiam.
+    failed   - [(diretório, OSError), ...] diretórios que não puderam ser criados.
+    skipped  - Entradas ignoradas (arquivos FILE_*, diretórios de AppDirs com type_root=True).
+
+    bool(report) é True se nenhum diretório falhou.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.created: list = []
+        self.existing: list = []
+        self.failed: list = []
+        self.skipped: list = []
+
+    def __bool__(self) -> bool:
+        return self.failed == []
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}(created={len(self.created)}, existing={len(self.existing)}, ' \
+            f'failed={len(self.failed)}, skipped={len(self.skipped)})'
+
+    def to_dict(self) -> dict:
+        return {
+            'created': list(self.created),
+            'existing': list(self.existing),
+            'failed': [(path, str(e)) for path, e in self.failed],
+            'skipped': list(self.skipped),
+        }
+
+
+def _list_entries(path: str) -> dict:
+    """Retorna {nome: os.DirEntry} do conteúdo de path, ou None se path não puder ser lido."""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name: entry for entry in entries}
+    except OSError:
+        return None
+
+
+def provision_dirs(paths, *, report: ProvisionReport=None) -> ProvisionReport:
+    """
+       Cria os diretórios de paths (None é ignorado) e retorna um ProvisionReport.
+
+       Os caminhos repetidos são removidos e os diretórios são criados em ordem
+    (os diretórios pai antes dos filhos). Cada diretório pai é lido uma única vez
+    com os.scandir(), os diretórios que já existem não custam nenhuma chamada
+    ao sistema e os.mkdir() só é chamado para os que faltam. os.makedirs() só é
+    usado quando o diretório pai não existe e não está em paths.
+    """
+    if report is None:
+        report = ProvisionReport()
+
+    # diretório pai -> {nome: os.DirEntry} (None = não foi possível ler).
+    listing = {}
+    # Em ordem, um diretório pai sempre vem antes dos seus filhos.
+    for path in sorted({os.path.abspath(p) for p in paths if p is not None}):
+        parent, name = os.path.split(path)
+        if not parent in listing:
+            listing[parent] = _list_entries(parent)
+        entries = listing[parent]
+        entry = entries.get(name) if entries is not None else None
+        if entry is not None:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = os.path.isdir(path)
+            if is_dir:
+                report.existing.append(path)
+            else:
+                report.failed.append((path, NotADirectoryError(ENOTDIR, os.strerror(ENOTDIR), path)))
+            continue
+
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            # Criado depois da leitura do diretório pai.
+            if os.path.isdir(path):
+                report.existing.append(path)
+            else:
+                report.failed.append((path, NotADirectoryError(ENOTDIR, os.strerror(ENOTDIR), path)))
+        except FileNotFoundError:
+            # Diretório pai inexistente (e que não está em paths).
+            try:
+                makedirs(path, exist_ok=True)
+            except OSError as e:
+                report.failed.append((path, e))
+            else:
+                report.created.append(path)
+                listing[path] = {}
+        except OSError as e:
+            report.failed.append((path, e))
+        else:
+            report.created.append(path)
+            # Um diretório recém-criado está vazio, não é preciso lê-lo.
+            listing[path] = {}
+    return report
+
+
+# Marca atributos ainda não calculados, quando None é um valor válido.
+_NOT_SET = object()
+
+
 def get_abspath(path: str) -> str:
     """Retorna o caminho absoluto de um arquivo ou diretório."""
     return os.path.abspath(path)
 
 
 def touch(file) -> bool:
+    from pathlib import Path
+
     try:
         Path(file).touch()
     except:
@@ -62,6 +219,447 @@ def touch(file) -> bool:
         return True
 
 
+def _create_temp(_dir: str, prefix: str, mode: int) -> tuple:
+    """Cria um arquivo temporário exclusivo em _dir com permissão mode (menos a umask), retorna (fd, caminho)."""
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0) | \
+        getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+    for _ in range(100):
+        tmp = os.path.join(_dir, f'{prefix}{os.urandom(6).hex()}.tmp')
+        try:
+            return os.open(tmp, flags, mode), tmp
+        except FileExistsError:
+            continue
+    raise FileExistsError(f'não foi possível criar um arquivo temporário em {_dir}')
+
+
+def write_file_atomic(path: str, data, *, durable: bool=False, encoding: str=None) -> None:
+    """
+       Grava data (str ou bytes) em path de forma atômica: o conteúdo é gravado
+    em um arquivo temporário no mesmo diretório, que depois substitui path com
+    os.replace(). Leitores nunca veem um arquivo gravado pela metade.
+
+    durable = Chama fsync() no arquivo e no diretório antes de retornar, para que
+              os dados sobrevivam a uma queda do sistema (mais lento).
+    encoding = Codificação usada quando data for str.
+
+    Retorna o os.stat_result do arquivo gravado.
+
+    As permissões (e o dono, quando possível) do arquivo original são mantidas,
+    se path for um link simbólico o arquivo apontado pelo link é substituído.
+    Exceções são repassadas para quem chamou a função.
+    """
+    path = os.path.realpath(path)
+    _dir = os.path.dirname(path)
+    try:
+        _stat = os.stat(path)
+    except FileNotFoundError:
+        _stat = None
+
+    # Um arquivo novo é criado com 0666 menos a umask (aplicada pelo kernel, sem
+    # os.umask(), que altera o processo inteiro). Ao substituir um arquivo, o
+    # temporário é criado com 0600 e recebe a permissão do original depois.
+    fd, tmp = _create_temp(_dir, f'.{os.path.basename(path)}.', 0o666 if _stat is None else 0o600)
+    try:
+        if isinstance(data, bytes):
+            file = open(fd, 'wb')
+        else:
+            file = open(fd, 'w', encoding=encoding)
+
+        with file:
+            file.write(data)
+            file.flush()
+            if durable:
+                os.fsync(file.fileno())
+            _new_stat = os.fstat(file.fileno())
+            if _instrumentation._enabled:
+                _instrumentation.record_write(_new_stat.st_size)
+
+        if _stat is not None:
+            os.chmod(tmp, _stat.st_mode & 0o7777)
+            if (_stat.st_uid != os.getuid()) or (_stat.st_gid != os.getgid()):
+                try:
+                    os.chown(tmp, _stat.st_uid, _stat.st_gid)
+                except OSError:
+                    pass
+
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            remove(tmp)
+        except OSError:
+            pass
+        raise
+
+    if durable:
+        _dirfd = os.open(_dir, os.O_RDONLY)
+        try:
+            os.fsync(_dirfd)
+        finally:
+            os.close(_dirfd)
+
+    return _new_stat
+
+
+
+def get_nested(content: dict, key: str, default=None, *, sep: str='.'):
+    """
+       Retorna o valor de uma chave aninhada, onde key é um caminho separado por sep.
+    Ex:
+       get_nested({'a': {'b': 1}}, 'a.b') -> 1
+    """
+    value = content
+    for part in key.split(sep):
+        if (not isinstance(value, dict)) or (not part in value):
+            return default
+        value = value[part]
+    return value
+
+
+def set_nested(content: dict, key: str, value, *, sep: str='.') -> None:
+    """
+       Altera/Cria uma chave aninhada, onde key é um caminho separado por sep.
+    Os dicionários intermediários são criados se não existirem.
+    Ex:
+       set_nested(content, 'a.b', 1) -> {'a': {'b': 1}}
+    """
+    parts = key.split(sep)
+    for part in parts[:-1]:
+        if not part in content:
+            content[part] = {}
+        content = content[part]
+        if not isinstance(content, dict):
+            raise Exception(f'set_nested() ERRO ... {part} não é um dicionário ... {key}')
+    content[parts[-1]] = value
+
+
+class JsonSerializer(object):
+    """
+       Codifica/Decodifica json usando o backend mais rápido disponível.
+
+    backend = 'auto' (padrão), 'orjson', 'ujson' ou 'json' (biblioteca padrão).
+              Com 'auto' o primeiro backend instalado de BACKENDS é usado, se o
+              backend pedido não estiver instalado a biblioteca padrão é usada.
+    compact = Gera json sem indentação e sem ordenar as chaves, para arquivos
+              que não são editados manualmente.
+
+    No modo padrão (compact=False) a saída é sempre gerada pela biblioteca padrão
+    (indent=4, sort_keys=True), para que o formato dos arquivos não dependa dos
+    pacotes instalados. Se o backend falhar (tipos não suportados, inteiros muito
+    grandes ...) a operação é repetida com a biblioteca padrão.
+    """
+    BACKENDS: tuple = ('orjson', 'ujson', 'json')
+    # Nome do backend -> módulo, ou None se não estiver instalado.
+    _backends: dict = {}
+
+    def __init__(self, backend: str='auto', *, compact: bool=False) -> None:
+        import json
+
+        super().__init__()
+        self.compact: bool = compact
+        self.backend: str = 'json'
+        self._module = json
+
+        if backend == 'auto':
+            _names = self.BACKENDS
+        elif backend in self.BACKENDS:
+            _names = (backend,)
+        else:
+            raise Exception(f'{__class__.__name__} ERRO ... backend inválido ... {backend}')
+
+        for name in _names:
+            if name == 'json':
+                break
+            module = self._import_backend(name)
+            if module is None:
+                continue
+            self._module = module
+            self.backend = name
+            break
+
+    @classmethod
+    def _import_backend(cls, name: str):
+        """Retorna o módulo do backend name, ou None se não estiver instalado (verificado uma única vez)."""
+        try:
+            return cls._backends[name]
+        except KeyError:
+            pass
+        try:
+            module = __import__(name)
+        except ImportError:
+            module = None
+        cls._backends[name] = module
+        return module
+
+    def loads(self, data):
+        """Decodifica data (str ou bytes)."""
+        import json
+
+        if self.backend != 'json':
+            try:
+                return self._module.loads(data)
+            except Exception:
+                pass
+        return json.loads(data)
+
+    def dumps(self, content):
+        """Codifica content, retorna str ou bytes (utf-8)."""
+        import json
+
+        if not self.compact:
+            return json.dumps(content, ensure_ascii=False, sort_keys=True, indent=4)
+
+        try:
+            if self.backend == 'orjson':
+                return self._module.dumps(content)
+            if self.backend == 'ujson':
+                return self._module.dumps(content, ensure_ascii=False, escape_forward_slashes=False)
+        except Exception:
+            pass
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+
+
+class _JsonScanner(object):
+    """
+       Percorre um documento json (bytes ou mmap) sem decodificar o documento
+    inteiro, apenas o valor procurado é decodificado com json.loads().
+    Valores ignorados são pulados com expressões regulares (strings) e contando
+    a profundidade de {} e [].
+    """
+    # Expressões regulares, compiladas no primeiro uso (veja _compile()).
+    _WS = _STRING = _SCALAR = _STRUCT = None
+
+    def __init__(self, buffer) -> None:
+        super().__init__()
+        if _JsonScanner._WS is None:
+            _JsonScanner._compile()
+        self.buffer = buffer
+        self.pos: int = 0
+
+    @staticmethod
+    def _compile() -> None:
+        import re
+
+        _JsonScanner._STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+        _JsonScanner._SCALAR = re.compile(rb'[^,\]}\s]+')
+        # Pula strings e valores simples até o próximo [ ] { ou }. Forma "desenrolada"
+        # (sem quantificadores aninhados sobre a mesma posição), o tempo é linear
+        # mesmo quando não existe um próximo [ ] { ou } (documento truncado).
+        _JsonScanner._STRUCT = re.compile(
+            rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*([\[\]{}])', re.DOTALL
+        )
+        _JsonScanner._WS = re.compile(rb'[ \t\n\r]*')
+
+    def _peek(self) -> bytes:
+        self.pos = self._WS.match(self.buffer, self.pos).end()
+        return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, char: bytes) -> None:
+        if self._peek() != char:
+            raise ValueError(f'json inválido, esperado {char} na posição {self.pos}')
+        self.pos += 1
+
+    def _string(self) -> bytes:
+        """Retorna a string na posição atual, com as aspas e sem decodificar."""
+        _match = self._STRING.match(self.buffer, self.pos)
+        if _match is None:
+            raise ValueError(f'json inválido, esperado uma string na posição {self.pos}')
+        self.pos = _match.end()
+        return _match.group()
+
+    def skip_value(self) -> None:
+        char = self._peek()
+        if char == b'"':
+            self._string()
+        elif char in (b'{', b'['):
+            depth = 0
+            _struct = self._STRUCT.match
+            while True:
+                _match = _struct(self.buffer, self.pos)
+                if _match is None:
+                    raise ValueError('json inválido, documento incompleto')
+                self.pos = _match.end()
+                depth += 1 if _match.group(1) in (b'{', b'[') else -1
+                if depth == 0:
+                    return
+        else:
+            _match = self._SCALAR.match(self.buffer, self.pos)
+            if _match is None:
+                raise ValueError(f'json inválido, esperado um valor na posição {self.pos}')
+            self.pos = _match.end()
+
+    def value(self):
+        """Decodifica e retorna o valor na posição atual."""
+        import json
+
+        self._peek()
+        start = self.pos
+        self.skip_value()
+        return json.loads(bytes(self.buffer[start:self.pos]))
+
+    def keys(self):
+        """Gerador com as chaves do objeto na posição atual, o valor de cada chave é pulado."""
+        import json
+
+        self._expect(b'{')
+        if self._peek() == b'}':
+            return
+        while True:
+            self._peek()
+            raw = self._string()
+            self._expect(b':')
+            yield json.loads(raw) if b'\\' in raw else raw[1:-1].decode('utf-8')
+            self.skip_value()
+            char = self._peek()
+            self.pos += 1
+            if char == b'}':
+                return
+            if char != b',':
+                raise ValueError(f'json inválido, esperado , ou }} na posição {self.pos - 1}')
+
+    def find_key(self, key: str) -> bool:
+        """
+           Procura key no objeto na posição atual, se encontrar a posição atual
+        passa a ser o valor de key.
+        """
+        if self._peek() != b'{':
+            return False
+        _keys = self.keys()
+        for _key in _keys:
+            if _key == key:
+                # O gerador está parado antes de pular o valor da chave.
+                return True
+        return False
+
+    def find_index(self, index: int) -> bool:
+        """Procura o item index do array na posição atual."""
+        if self._peek() != b'[':
+            return False
+        self.pos += 1
+        if self._peek() == b']':
+            return False
+        n = 0
+        while n < index:
+            self.skip_value()
+            char = self._peek()
+            self.pos += 1
+            if char == b']':
+                return False
+            if char != b',':
+                raise ValueError(f'json inválido, esperado , ou ] na posição {self.pos - 1}')
+            n += 1
+        self._peek()
+        return True
+
+    def find_pointer(self, pointer: str) -> bool:
+        """Procura um JSON pointer (RFC 6901), Ex: '/apps/0/name'."""
+        for token in _split_pointer(pointer):
+            if self._peek() == b'[':
+                if (not token.isdigit()) or (not self.find_index(int(token))):
+                    return False
+            elif not self.find_key(token):
+                return False
+        return True
+
+
+def _split_pointer(pointer: str) -> list:
+    """Divide um JSON pointer em chaves. Ex: '/a/b~1c' -> ['a', 'b/c']"""
+    if pointer == '':
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _apply_journal_record(content: dict, op: str, key: list, value) -> None:
+    """Aplica um registro do journal de FileJson em content."""
+    for part in key[:-1]:
+        if not isinstance(content.get(part), dict):
+            content[part] = {}
+        content = content[part]
+    if op == 'set':
+        content[key[-1]] = value
+    elif op == 'del':
+        content.pop(key[-1], None)
+
+
+class FileLock(object):
+    """
+       Trava entre processos baseada em fcntl.flock(), usando um arquivo de trava
+    separado (path), já que os arquivos protegidos são substituídos com os.replace().
+
+    shared()    - Trava compartilhada (vários leitores ao mesmo tempo).
+    exclusive() - Trava exclusiva (escrita).
+
+    Se a trava não for obtida em timeout segundos, TimeoutError é gerado.
+    A trava é reentrante dentro da mesma thread, uma trava compartilhada pedida
+    enquanto a trava exclusiva está ativa usa a trava exclusiva. Em sistemas sem
+    fcntl (Windows) as travas não fazem nada.
+    """
+    def __init__(self, path: str, *, timeout: float=10.0) -> None:
+        import threading
+
+        super().__init__()
+        self.path: str = path
+        self.timeout: float = timeout
+        self._thread_lock = threading.RLock()
+        self._fd: int = None
+        self._mode: int = None
+        self._depth: int = 0
+
+    @contextmanager
+    def shared(self):
+        with self._acquire(fcntl.LOCK_SH if fcntl is not None else None):
+            yield self
+
+    @contextmanager
+    def exclusive(self):
+        with self._acquire(fcntl.LOCK_EX if fcntl is not None else None):
+            yield self
+
+    @contextmanager
+    def _acquire(self, mode: int):
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f'{__class__.__name__} tempo esgotado ... {self.path}')
+        try:
+            if fcntl is None:
+                yield
+                return
+
+            if self._depth > 0:
+                if (mode == fcntl.LOCK_EX) and (self._mode != fcntl.LOCK_EX):
+                    raise Exception(f'{__class__.__name__} ERRO ... trava compartilhada ativa ... {self.path}')
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                self._flock(fd, mode)
+                self._fd, self._mode, self._depth = fd, mode, 1
+                try:
+                    yield
+                finally:
+                    self._fd, self._mode, self._depth = None, None, 0
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        finally:
+            self._thread_lock.release()
+
+    def _flock(self, fd: int, mode: int) -> None:
+        deadline = time.monotonic() + self.timeout
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f'{__class__.__name__} tempo esgotado ... {self.path}')
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
 
 
 class FilePath(object):
@@ -73,19 +671,48 @@ class FilePath(object):
     dirname()   - Retorna o diretório PAI do arquivo.
     basename()  - Retorna o nome do arquivo com a extensão.
     extension() - Retorna a extensão do arquivo, com base no nome.
+
+       O caminho absoluto, dirname, basename e a extensão são calculados apenas
+    uma vez (no primeiro uso) e guardados na instância. Caminhos relativos são
+    resolvidos com o diretório de trabalho do primeiro uso.
     """
+    __slots__ = ('_file', '_path', '_dirname', '_basename', '_extension')
+
     def __init__(self, file: str) -> None:
-        super().__init__()
         self.file = file
 
+    @classmethod
+    def from_paths(cls, paths) -> list:
+        """Cria uma lista de FilePath apartir de um iterável de caminhos, sem chamar __init__."""
+        _new = object.__new__
+        _lst = []
+        for file in paths:
+            obj = _new(cls)
+            obj._file = file
+            obj._path = obj._dirname = obj._basename = None
+            obj._extension = _NOT_SET
+            _lst.append(obj)
+        return _lst
+
+    @property
+    def file(self) -> str:
+        return self._file
+
+    @file.setter
+    def file(self, new_file: str) -> None:
+        self._file = new_file
+        self._path = self._dirname = self._basename = None
+        self._extension = _NOT_SET
+
     def path(self) -> str:
         """Retorna o caminho absoluto de um arquivo"""
-        return get_abspath(self.file)
+        if self._path is None:
+            self._path = get_abspath(self._file)
+        return self._path
 
     def exists(self) -> bool:
         try:
-            if os.path.exists(self.path()):
-                return True
+            return os.path.exists(self.path())
         except:
             return False
 
@@ -97,15 +724,18 @@ class FilePath(object):
 
         name() -> file_name
         """
-        if self.extension() is None:
+        _ext = self.extension()
+        if _ext is None:
             return self.basename()
-        return self.basename().replace(self.extension(), "")
+        return self.basename().replace(_ext, "")
     
     def dirname(self) -> str:
         """
            Retorna o caminho absoluto do diretório pai do arquivo.
         """
-        return os.path.dirname(self.path())
+        if self._dirname is None:
+            self._dirname = os.path.dirname(self.path())
+        return self._dirname
 
     def basename(self) -> str:
         """
@@ -115,19 +745,23 @@ class FilePath(object):
 
         basename() -> file_name.pdf
         """
-        return os.path.basename(self.path())
+        if self._basename is None:
+            self._basename = os.path.basename(self.path())
+        return self._basename
         
     def drive(self):
-        return Path(self.path()).drive
+        return os.path.splitdrive(self.path())[0]
 
     def extension(self) -> str:
         """Retorna a extensão do arquivo baseado no nome"""
-        _ext = os.path.splitext(self.path())[1]
-        if _ext == '': 
-            return None
-        return _ext
+        if self._extension is _NOT_SET:
+            _ext = os.path.splitext(self.path())[1]
+            self._extension = None if _ext == '' else _ext
+        return self._extension
     
     def touch(self) -> None:
+        from pathlib import Path
+
         Path(self.path()).touch()
 
     def delete(self) -> None:
@@ -139,24 +773,181 @@ class FilePath(object):
 
 
 
+FileStat = namedtuple('FileStat', ('path', 'exists', 'is_dir', 'size', 'mtime'))
+FileStat.__doc__ = """
+   Linha da tabela retornada por FilePathSet.stat(): (path, exists, is_dir, size, mtime).
+size/mtime são None se o arquivo não existir (e em exists()/missing()).
+"""
+
+
+class FilePathSet(object):
+    """
+       Coleção de caminhos (str ou FilePath) para verificar vários arquivos de uma vez.
+    Os caminhos são agrupados por diretório, e cada diretório é lido uma única
+    vez com os.scandir(), em vez de uma chamada os.path.exists() por arquivo.
+
+    exists()  - Retorna {caminho: bool}.
+    missing() - Retorna os caminhos que não existem.
+    stat()    - Retorna {caminho: FileStat(path, exists, is_dir, size, mtime)}.
+
+    max_workers = Número de threads para ler os diretórios (0 = sem threads).
+    """
+    def __init__(self, paths=(), *, max_workers: int=0) -> None:
+        super().__init__()
+        self.max_workers: int = max_workers
+        # diretório -> {nome do arquivo: caminho absoluto}
+        self._dirs: dict = {}
+        self._count: int = 0
+        for path in paths:
+            self.add(path)
+
+    def add(self, path) -> None:
+        if isinstance(path, FilePath):
+            _dir, _name, path = path.dirname(), path.basename(), path.path()
+        else:
+            path = get_abspath(path)
+            _dir, _name = os.path.split(path)
+        names = self._dirs.setdefault(_dir, {})
+        if not _name in names:
+            names[_name] = path
+            self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for names in self._dirs.values():
+            yield from names.values()
+
+    def exists(self) -> dict:
+        return {path: row.exists for path, row in self._scan(with_stat=False).items()}
+
+    def missing(self) -> list:
+        return [path for path, row in self._scan(with_stat=False).items() if not row.exists]
+
+    def stat(self) -> dict:
+        return self._scan(with_stat=True)
+
+    def _scan(self, *, with_stat: bool) -> dict:
+        _items = list(self._dirs.items())
+        if (self.max_workers > 1) and (len(_items) > 1):
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                _results = list(executor.map(lambda item: self._scan_dir(*item, with_stat), _items))
+        else:
+            _results = [self._scan_dir(_dir, names, with_stat) for _dir, names in _items]
+
+        table = {}
+        for result in _results:
+            table.update(result)
+        return table
+
+    @staticmethod
+    def _stat_path(path: str, with_stat: bool) -> FileStat:
+        """FileStat de path com os.stat(), quando o diretório não pode ser lido."""
+        try:
+            _stat = os.stat(path)
+        except (OSError, ValueError):
+            return FileStat(path, False, False, None, None)
+        if with_stat:
+            return FileStat(path, True, S_ISDIR(_stat.st_mode), _stat.st_size, _stat.st_mtime)
+        return FileStat(path, True, S_ISDIR(_stat.st_mode), None, None)
+
+    @staticmethod
+    def _scan_dir(_dir: str, names: dict, with_stat: bool) -> dict:
+        table = {}
+        _root = names.get('')
+        if _root is not None:
+            # Diretório raiz ('/'), não tem um nome dentro de outro diretório.
+            table[_root] = FilePathSet._stat_path(_root, with_stat)
+            if len(names) == 1:
+                return table
+        try:
+            with os.scandir(_dir) as entries:
+                for entry in entries:
+                    path = names.get(entry.name)
+                    if path is None:
+                        continue
+                    try:
+                        if with_stat or entry.is_symlink():
+                            # Links são seguidos, assim como em os.path.exists().
+                            _stat = entry.stat()
+                            table[path] = FileStat(
+                                path, True, S_ISDIR(_stat.st_mode), _stat.st_size, _stat.st_mtime
+                            )
+                        else:
+                            table[path] = FileStat(path, True, entry.is_dir(), None, None)
+                    except OSError:
+                        pass
+                    if len(table) == len(names):
+                        break
+        except (FileNotFoundError, NotADirectoryError):
+            # Diretório inexistente, nenhum dos arquivos existe.
+            pass
+        except OSError:
+            # Sem permissão de leitura (ex: diretório 0711), os arquivos ainda podem
+            # existir e ser acessados pelo nome.
+            for path in names.values():
+                if not path in table:
+                    table[path] = FilePathSet._stat_path(path, with_stat)
+
+        for path in names.values():
+            if not path in table:
+                table[path] = FileStat(path, False, False, None, None)
+        return table
+
+
+
 class FileReader(object):
     """
        Classe para ler e escrever linhas em arquivos de texto
 
     get_lines() - Retorna as linhas de um arquivo em forma de lista.
+    iter_lines() - Retorna um gerador que lê as linhas do arquivo sob demanda.
+    find_many(list) - Busca vários textos no arquivo com uma única leitura.
+    get_line(n) - Retorna a linha n do arquivo, usando um índice de linhas.
     write_lines(list) - Recebe uma lista, e grava os dados da lista no arquivo.
     """
 
-    def __init__(self, file_path: FilePath) -> None:
+    # Tamanho padrão do buffer de leitura usado por iter_lines().
+    BUFFER_SIZE: int = 64 * 1024
+    # Tamanho dos blocos convertidos para minúsculo na busca via mmap com ignore_case.
+    MMAP_CHUNK_SIZE: int = 4 * 1024 * 1024
+    # Extensão do arquivo (sidecar) onde o índice de linhas é gravado.
+    INDEX_SUFFIX: str = '.lineidx'
+    # Cabeçalho do sidecar: assinatura, tamanho, mtime_ns, inode e número de linhas.
+    _INDEX_MAGIC: bytes = b'ACLIDX1\0'
+    _INDEX_HEADER = struct.Struct('<8sQQQQ')
+
+    def __init__(
+                self, file_path: FilePath, *, buffer_size: int=BUFFER_SIZE, persist_index: bool=False,
+                durable: bool=False
+            ) -> None:
         super().__init__()
         self.file_path: FilePath = file_path
-
+        self.buffer_size: int = buffer_size
+        # durable: write_lines() chama fsync() antes de substituir o arquivo.
+        self.durable: bool = durable
+        # persist_index: gravar o índice de linhas no disco (veja index_path()). Desativado
+        # por padrão, para não criar arquivos ao lado de ~/.bashrc, /etc/... apenas lidos.
+        self.persist_index: bool = persist_index
+        # Índice de linhas, offset (em bytes) do inicio de cada linha.
+        self._index: array = None
+        # (st_size, st_mtime_ns, st_ino) do arquivo quando o índice foi criado.
+        self._index_key: tuple = None
+        # Callbacks registrados com watch(): [(watcher, path, callback), ...]
+        self._watches: list = []
+
+    @instrumented('FileReader.get_lines', path_attr='file_path')
     def get_lines(self) -> list:
         """Retorna uma lista com as linhas do arquivo de texto."""
         lines = []
         try:
             with open(self.file_path.path(), 'rt') as file:
                 lines = file.readlines()
+                if _instrumentation._enabled:
+                    _instrumentation.record_read(file.buffer.tell())
 
         except Exception as e:
             print(__class__.__name__, e)
@@ -164,66 +955,465 @@ class FileReader(object):
         else:
             return lines
 
+    @instrumented_generator('FileReader.iter_lines', path_attr='file_path')
+    def iter_lines(self, *, buffer_size: int=None):
+        """
+           Gerador que retorna as linhas do arquivo uma a uma, sem carregar
+        o arquivo inteiro na memória. As linhas mantém a quebra de linha '\n'
+        assim como em get_lines().
+        buffer_size = Tamanho do buffer de leitura em bytes (padrão self.buffer_size).
+        """
+        if buffer_size is None:
+            buffer_size = self.buffer_size
+
+        try:
+            file = open(self.file_path.path(), 'rt', buffering=buffer_size)
+        except Exception as e:
+            print(__class__.__name__, e)
+            return
+
+        with file:
+            try:
+                # Sem "yield from", que fecharia o arquivo antes de record_read().
+                for line in file:
+                    yield line
+            finally:
+                if _instrumentation._enabled:
+                    _instrumentation.record_read(file.buffer.tell())
+
+    @instrumented('FileReader.write_lines', path_attr='file_path')
     def write_lines(self, lines: list) -> None:
         """
            Sobreescrever um arquivo, gravando o conteúdo de lines no arquivo.
         Todos os dados existentes serão perdidos. Quebras de linha '\n' são 
         inseridas automáticamente no fim de cada linha.
+
+           O arquivo é substituído de forma atômica (veja write_file_atomic()),
+        com self.durable os dados são sincronizados com o disco (fsync).
         """
         if not isinstance(lines, list):
             print(__class__.__name__, "ERRO ... lines precisa ser do tipo lista")
             return
 
+        self._index, self._index_key = None, None
         try:
-            with open(self.file_path.path(), 'w') as file:
-                for line in lines:
-                    file.write(f'{line}\n')
+            write_file_atomic(self.file_path.path(), ''.join(f'{line}\n' for line in lines), durable=self.durable)
         except Exception as e:
             print(__class__.__name__, e)
 
+    @instrumented('FileReader.append_lines', path_attr='file_path')
     def append_lines(self, lines: list) -> None:
         """Adiciona o conteúdo de lines no fim do arquivo de texto"""
         if not isinstance(lines, list):
             print(__class__.__name__, "ERRO ... lines precisa ser do tipo lista")
             return
 
+        # O índice pode ser estendido apenas se o arquivo não foi alterado depois de indexado.
+        _extend_index = (self._index is not None) and (self._stat_key() == self._index_key)
         try:
             with open(self.file_path.path(), 'a') as file:
-                for line in lines:
-                    file.write(f'{line}\n')
+                _start = file.tell()
+                file.write(''.join(f'{line}\n' for line in lines))
+                if _instrumentation._enabled:
+                    file.flush()
+                    _instrumentation.record_write(file.buffer.tell() - _start)
+        except Exception as e:
+            print(__class__.__name__, e)
+
+        if _extend_index:
+            self._update_index(self._stat_key())
+        else:
+            self._index, self._index_key = None, None
+
+    def watch(self, callback=None, *, watcher=None) -> None:
+        """
+           Monitora o arquivo, quando o arquivo for alterado o índice de linhas
+        é descartado e callback(self) é chamado (na thread do watcher).
+        watcher = Instância de watcher.FileWatcher (padrão get_default_watcher()).
+        """
+        from .watcher import get_default_watcher
+
+        if watcher is None:
+            watcher = get_default_watcher()
+
+        def _changed(path: str) -> None:
+            if self._stat_key() != self._index_key:
+                self._index, self._index_key = None, None
+            if callback is not None:
+                callback(self)
+
+        watcher.watch(self.file_path.path(), _changed)
+        self._watches.append((watcher, self.file_path.path(), _changed))
+
+    def unwatch(self) -> None:
+        """Remove os callbacks registrados com watch()."""
+        for watcher, path, handler in self._watches:
+            watcher.unwatch(path, handler)
+        self._watches = []
+
+    def index_path(self) -> str:
+        """Retorna o caminho do arquivo onde o índice de linhas é gravado."""
+        return self.file_path.path() + self.INDEX_SUFFIX
+
+    @instrumented('FileReader.line_count', path_attr='file_path')
+    def line_count(self) -> int:
+        """Retorna o número de linhas do arquivo, usando o índice de linhas."""
+        return len(self._get_index())
+
+    @instrumented('FileReader.get_line', path_attr='file_path')
+    def get_line(self, n: int) -> str:
+        """
+           Retorna a linha n (começando em 0) do arquivo sem ler o arquivo inteiro.
+        Assim como uma lista, aceita índices negativos e gera IndexError se
+        a linha não existir.
+        """
+        _index = self._get_index()
+        if n < 0:
+            n += len(_index)
+        if not 0 <= n < len(_index):
+            raise IndexError(f'{__class__.__name__} linha {n} não existe')
+
+        _lines = self.get_range(n, n + 1)
+        return _lines[0]
+
+    @instrumented('FileReader.get_range', path_attr='file_path')
+    def get_range(self, start: int, stop: int) -> list:
+        """
+           Retorna as linhas no intervalo [start, stop) com uma única leitura,
+        equivalente a get_lines()[start:stop].
+        """
+        _index = self._get_index()
+        start, stop, _ = slice(start, stop).indices(len(_index))
+        if start >= stop:
+            return []
+
+        begin = _index[start]
+        end = _index[stop] if stop < len(_index) else self._index_key[0]
+        try:
+            with open(self.file_path.path(), 'rb') as file:
+                file.seek(begin)
+                data = file.read(end - begin)
+                if _instrumentation._enabled:
+                    _instrumentation.record_read(len(data))
         except Exception as e:
             print(__class__.__name__, e)
+            return []
+
+        # Apenas '\n' separa as linhas, como no índice (str.splitlines() também
+        # separa em '\x0c', '\x85', '\u2028' ...).
+        _lines = data.decode('utf-8', errors='replace').replace('\r\n', '\n').split('\n')
+        _last = _lines.pop()
+        _lines = [line + '\n' for line in _lines]
+        if _last != '':
+            _lines.append(_last)
+        return _lines
+
+    @instrumented('FileReader.build_index', path_attr='file_path')
+    def build_index(self) -> None:
+        """
+           Cria (ou atualiza) o índice de linhas do arquivo. O índice é criado
+        automáticamente por get_line(), get_range() e line_count().
+        """
+        self._get_index()
+
+    def _stat_key(self) -> tuple:
+        try:
+            _stat = os.stat(self.file_path.path())
+        except OSError:
+            return None
+        return (_stat.st_size, _stat.st_mtime_ns, _stat.st_ino)
+
+    def _get_index(self) -> array:
+        """Retorna o índice de linhas, validado com o tamanho/mtime/inode do arquivo."""
+        _key = self._stat_key()
+        if _key is None:
+            self._index, self._index_key = None, None
+            return array('Q')
+
+        if (self._index is not None) and (self._index_key == _key):
+            return self._index
+
+        if self.persist_index and self._load_index(_key):
+            return self._index
+
+        self._index, self._index_key = None, None
+        self._update_index(_key)
+        return self._index
+
+    def _update_index(self, key: tuple) -> None:
+        """
+           Cria o índice, ou estende o índice atual a partir do fim da parte
+        já indexada, quando o arquivo apenas cresceu.
+        """
+        size = key[0]
+        if (self._index is None) or (len(self._index) == 0):
+            _index, pos = array('Q'), 0
+            if size > 0:
+                _index.append(0)
+        else:
+            _index = self._index
+            # Começa no último byte indexado, se for '\n' uma nova linha começa em seguida.
+            pos = max(self._index_key[0] - 1, 0)
+
+        try:
+            with open(self.file_path.path(), 'rb') as file:
+                file.seek(pos)
+                while pos < size:
+                    chunk = file.read(min(self.buffer_size, size - pos))
+                    if chunk == b'':
+                        break
+                    if _instrumentation._enabled:
+                        _instrumentation.record_read(len(chunk))
+                    i = chunk.find(b'\n')
+                    while i != -1:
+                        if pos + i + 1 < size:
+                            _index.append(pos + i + 1)
+                        i = chunk.find(b'\n', i + 1)
+                    pos += len(chunk)
+        except Exception as e:
+            print(__class__.__name__, e)
+            self._index, self._index_key = None, None
+            return
 
-    def is_text(self, text: str) -> bool:
-        """Verifica se text existe no arquivo de texto"""
-        if len(self.find_text(text)) > 0:
+        self._index, self._index_key = _index, key
+        if self.persist_index:
+            self._save_index()
+
+    def _load_index(self, key: tuple) -> bool:
+        """Carrega o índice gravado no disco, se ele corresponder a key."""
+        try:
+            with open(self.index_path(), 'rb') as file:
+                header = file.read(self._INDEX_HEADER.size)
+                magic, size, mtime_ns, ino, count = self._INDEX_HEADER.unpack(header)
+                if (magic != self._INDEX_MAGIC) or ((size, mtime_ns, ino) != key):
+                    return False
+                _index = array('Q')
+                _index.frombytes(file.read())
+                if _instrumentation._enabled:
+                    _instrumentation.record_read(file.tell())
+        except (OSError, struct.error, ValueError):
+            return False
+
+        if len(_index) != count:
+            return False
+        self._index, self._index_key = _index, key
+        return True
+
+    def _save_index(self) -> None:
+        """Grava o índice no disco, falhas são ignoradas (o índice continua na memória)."""
+        try:
+            with open(self.index_path(), 'wb') as file:
+                file.write(self._INDEX_HEADER.pack(self._INDEX_MAGIC, *self._index_key, len(self._index)))
+                self._index.tofile(file)
+                if _instrumentation._enabled:
+                    _instrumentation.record_write(file.tell())
+        except OSError:
+            pass
+
+    @instrumented('FileReader.is_text', path_attr='file_path')
+    def is_text(self, text: str, *, ignore_case: bool=False) -> bool:
+        """
+           Verifica se text existe no arquivo de texto. A leitura é
+        interrompida na primeira ocorrência.
+        """
+        if len(self.find_text(text, max_count=1, ignore_case=ignore_case)) > 0:
             return True
         return False
     
-    def find_text(self, text: str, *, max_count: int=0, ignore_case:bool=False) -> list:
+    @instrumented('FileReader.find_text', path_attr='file_path')
+    def find_text(
+                self, text: str, *, max_count: int=0, ignore_case:bool=False, use_mmap: bool=False
+            ) -> list:
         """
             Retorna uma lista com todas as ocorrências de text nas linhas do arquivo.
-        max_cout = Máximo de ocorrências a buscar no arquivo.
+        max_cout = Máximo de ocorrências a buscar no arquivo, a leitura do
+                   arquivo é interrompida assim que max_count for atingido.
         ignore_case = Ignora o case sensitive.
+        use_mmap = Mapeia o arquivo na memória e faz a busca nos bytes do arquivo,
+                   as linhas são decodificadas apenas para as ocorrências encontradas.
+                   Recomendado para arquivos grandes.
         """
-        _lines = self.get_lines()
-        _lst = []
-        if _lines == []:
-            return []
+        if use_mmap and ((not ignore_case) or text.isascii()):
+            return self._find_text_mmap(text, max_count=max_count, ignore_case=ignore_case)
 
-        for line in _lines:
-            if ignore_case:
-                if text.lower() in line.lower():
-                    _lst.append(line)
-            else:
-                if text in line:
-                    _lst.append(line)
+        _lst = []
+        if ignore_case:
+            text = text.lower()
 
-            if (max_count > 0) and (len(_lst) == max_count):
-                break
+        _lines = self.iter_lines()
+        try:
+            for line in _lines:
+                if ignore_case:
+                    if text in line.lower():
+                        _lst.append(line)
+                else:
+                    if text in line:
+                        _lst.append(line)
+
+                if (max_count > 0) and (len(_lst) == max_count):
+                    break
+        finally:
+            # Fecha o arquivo imediatamente em caso de saída antecipada.
+            _lines.close()
            
         return _lst
 
+    @instrumented('FileReader.find_many', path_attr='file_path')
+    def find_many(self, patterns, *, max_count=0, ignore_case=False) -> dict:
+        """
+           Busca vários textos no arquivo com uma única leitura.
+        Retorna um dicionário no formato {pattern: [linhas que contém pattern]}.
+
+        patterns = Lista de textos a buscar.
+        max_count = Máximo de ocorrências por pattern (int), ou um dicionário
+                    {pattern: max_count} para definir o limite de cada pattern.
+        ignore_case = Ignora o case sensitive (bool), ou um dicionário
+                      {pattern: ignore_case}.
+
+        A leitura é interrompida assim que todos os patterns atingirem max_count.
+        """
+        import re
+
+        patterns = list(dict.fromkeys(patterns))
+        _found = {pattern: [] for pattern in patterns}
+        if patterns == []:
+            return _found
+
+        _max = {
+            p: (max_count.get(p, 0) if isinstance(max_count, dict) else max_count) for p in patterns
+        }
+        _case_sensitive = [
+            p for p in patterns if not (ignore_case.get(p, False) if isinstance(ignore_case, dict) else ignore_case)
+        ]
+        _ignore_case = [p for p in patterns if not p in _case_sensitive]
+        # Pares (pattern, texto a buscar na linha) dos patterns ignore_case.
+        _lower = [(p, p.lower()) for p in _ignore_case]
+
+        # Uma única expressão regular com todos os patterns é usada como filtro,
+        # apenas as linhas aceitas pelo filtro são comparadas com cada pattern.
+        _alternatives = [re.escape(p) for p in _case_sensitive]
+        _alternatives += [f'(?i:{re.escape(p)})' for p in _ignore_case]
+        _alternatives.sort(key=len, reverse=True)
+        _filter = re.compile('|'.join(_alternatives)).search
+
+        # Patterns que ainda não atingiram max_count.
+        _pending = len(patterns)
+        _lines = self.iter_lines()
+        try:
+            for line in _lines:
+                if _filter(line) is None:
+                    continue
+
+                _matches = [p for p in _case_sensitive if p in line]
+                if _lower != []:
+                    _line_lower = line.lower()
+                    _matches += [p for p, text in _lower if text in _line_lower]
+
+                for p in _matches:
+                    if (_max[p] > 0) and (len(_found[p]) >= _max[p]):
+                        continue
+                    _found[p].append(line)
+                    if len(_found[p]) == _max[p]:
+                        _pending -= 1
+
+                if _pending == 0:
+                    break
+        finally:
+            _lines.close()
+
+        return _found
+
+    @instrumented('FileReader.contains_any', path_attr='file_path')
+    def contains_any(self, patterns, *, ignore_case: bool=False) -> bool:
+        """Verifica se pelo menos um dos textos em patterns existe no arquivo."""
+        import re
+
+        patterns = list(patterns)
+        if patterns == []:
+            return False
+        _filter = re.compile(
+            '|'.join(re.escape(p) for p in patterns), re.IGNORECASE if ignore_case else 0
+        ).search
+
+        _lines = self.iter_lines()
+        try:
+            for line in _lines:
+                if _filter(line) is not None:
+                    return True
+        finally:
+            _lines.close()
+        return False
+
+    def _find_text_mmap(self, text: str, *, max_count: int=0, ignore_case: bool=False) -> list:
+        """
+           Busca text com bytes.find() sobre o arquivo mapeado na memória.
+        Com ignore_case o arquivo é convertido para minúsculo em blocos de
+        MMAP_CHUNK_SIZE bytes (apenas textos ASCII, veja find_text()).
+        """
+        import mmap
+
+        _lst = []
+        needle = text.encode('utf-8')
+        if needle == b'':
+            return self.find_text(text, max_count=max_count)
+        if ignore_case:
+            needle = needle.lower()
+
+        try:
+            with open(self.file_path.path(), 'rb') as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return _lst
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception as e:
+            print(__class__.__name__, e)
+            return _lst
+
+        with buffer:
+            size = len(buffer)
+            # Bloco atual convertido para minúsculo (ignore_case), e seu offset no arquivo.
+            chunk, chunk_start = b'', 0
+
+            pos = 0
+            while pos < size:
+                if not ignore_case:
+                    hit = buffer.find(needle, pos)
+                else:
+                    hit = -1
+                    while pos < size:
+                        if not (chunk_start <= pos and pos + len(needle) <= chunk_start + len(chunk)):
+                            # Os blocos se sobrepõem em len(needle) bytes para não perder
+                            # ocorrências na fronteira entre dois blocos.
+                            chunk_start = pos
+                            chunk = buffer[pos:pos + self.MMAP_CHUNK_SIZE + len(needle)].lower()
+                        hit = chunk.find(needle, pos - chunk_start)
+                        if hit != -1:
+                            hit += chunk_start
+                            break
+                        if chunk_start + len(chunk) >= size:
+                            break
+                        pos = chunk_start + len(chunk) - len(needle) + 1
+                if hit == -1:
+                    break
+
+                # Converter o offset da ocorrência na linha correspondente.
+                start = buffer.rfind(b'\n', 0, hit) + 1
+                end = buffer.find(b'\n', hit)
+                end = size if end == -1 else end + 1
+                line = buffer[start:end].decode('utf-8', errors='replace')
+                if line.endswith('\r\n'):
+                    line = line[:-2] + '\n'
+                _lst.append(line)
+
+                if (max_count > 0) and (len(_lst) == max_count):
+                    break
+                pos = end
+
+            if _instrumentation._enabled:
+                # Bytes percorridos: até a última ocorrência (max_count) ou o arquivo inteiro.
+                _instrumentation.record_read(end if (max_count > 0) and (len(_lst) == max_count) else size)
+
+        return _lst
+
         
 
 class FileJson(object):
@@ -237,11 +1427,68 @@ class FileJson(object):
 
     - Alterar/Adicionar uma chave.
 
+    - Alterar várias chaves com uma única gravação (update_many(), transaction()).
+
+       Com locking=True as alterações são protegidas entre processos com uma trava
+    exclusiva (veja FileLock, arquivo <arquivo>.lock). As leituras não usam a trava,
+    pois o arquivo é sempre substituído de forma atômica, exceto com journal=True,
+    onde leituras e adições no journal usam a trava compartilhada.
+
+       Com journal=True as alterações são adicionadas no arquivo <arquivo>.journal
+    (uma linha por alteração) em vez de gravar o arquivo .json inteiro. As leituras
+    aplicam o journal sobre o arquivo .json, e quando o journal passa de
+    journal_max_records registros ou journal_max_bytes bytes ele é incorporado
+    ao arquivo .json (compact_journal()).
     """
-    def __init__(self, file_path_json: FilePath):
+    # Extensão do arquivo de journal.
+    JOURNAL_SUFFIX: str = '.journal'
+    # Extensão do arquivo de trava.
+    LOCK_SUFFIX: str = '.lock'
+
+    def __init__(
+                self, file_path_json: FilePath, *, durable: bool=False, cache: bool=True,
+                backend: str='auto', compact: bool=False, lazy: bool=False, journal: bool=False,
+                journal_max_records: int=1000, journal_max_bytes: int=1024 * 1024,
+                background_compaction: bool=False, locking: bool=False, lock_timeout: float=10.0
+            ):
+        import threading
+
         super().__init__()
         self.file_path_json: FilePath = file_path_json
-
+        # backend/compact: veja JsonSerializer.
+        self.serializer: JsonSerializer = JsonSerializer(backend, compact=compact)
+        # durable: write_lines() chama fsync() antes de substituir o arquivo.
+        self.durable: bool = durable
+        # cache: manter o conteúdo do arquivo na memória, o arquivo só é lido
+        # novamente se (st_mtime_ns, st_size, st_ino) mudar.
+        self.cache: bool = cache
+        # lazy: is_key() e get_value() procuram a chave percorrendo o arquivo, sem
+        # decodificar o documento inteiro (se o conteúdo não estiver no cache).
+        self.lazy: bool = lazy
+        # journal: veja a documentação da classe.
+        self.journal: bool = journal
+        self.journal_max_records: int = journal_max_records
+        self.journal_max_bytes: int = journal_max_bytes
+        # background_compaction: compact_journal() é executado em uma thread.
+        self.background_compaction: bool = background_compaction
+        # locking: veja a documentação da classe.
+        self.locking: bool = locking
+        self._lock: FileLock = FileLock(self.file_path_json.path() + self.LOCK_SUFFIX, timeout=lock_timeout)
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        # (conteúdo, chave, json lido/gravado ou None), substituído de uma só vez para
+        # que outras threads nunca vejam o conteúdo de uma leitura com a chave de outra.
+        # Cópias do conteúdo são feitas decodificando o json novamente (mais rápido
+        # que copiar o dicionário).
+        self._cache: tuple = None
+        # Número de registros no journal (conhecidos por esta instância).
+        self._journal_records: int = 0
+        self._journal_lock = threading.RLock()
+        self._compaction_thread: threading.Thread = None
+        # Callbacks registrados com watch(): [(watcher, path, callback), ...]
+        self._watches: list = []
+
+    @instrumented('FileJson.write_lines', path_attr='file_path_json')
     def write_lines(self, new_lines: dict):
         """
         Apaga o conteúdo do arquivo .json, e escreve os dados 'new_lines' no arquivo.
@@ -252,53 +1499,450 @@ class FileJson(object):
             raise Exception(f'{__class__.__name__} ERRO ... tipo de dados incorreto ... {new_lines}')
             return
 
-        try:
-            with open(self.file_path_json.path(), 'w', encoding='utf8') as jfile:
-                json.dump(new_lines, jfile, ensure_ascii=False, sort_keys=True, indent=4)
-        except Exception as e:
-            #print(__class__.__name__, e)
-            raise Exception(f'{__class__.__name__} {e}')
+        # new_lines pertence a quem chamou o método, por isso não vai para o cache.
+        with self._lock_exclusive():
+            self._write_content(new_lines, cache=False)
 
+    @instrumented('FileJson.lines_to_dict', path_attr='file_path_json')
     def lines_to_dict(self) -> dict:
         """
         Ler o conteúdo do arquivo .json e retornar as linhas em forma de um dicionário
         """
-        try:
-            with open(self.file_path_json.path(), 'rt', encoding='utf8') as jfile:
-                content = json.load(jfile)
-        except Exception as e:
-            print(__class__.__name__, e)
-            return {}
-        else:
-            return content
+        content = self._load()
+        if self.cache:
+            # O conteúdo em cache não pode ser alterado por quem chamou o método.
+            return self._copy_content(content)
+        return content
 
+    @instrumented('FileJson.update_key', path_attr='file_path_json')
     def update_key(self, new_key: str, value: str):
         """
           Altera/Cria a chave 'new_key' com o valor 'value'
 
         Se new_key já existir, será modificada, se não será alterada.
         """
-        content = self.lines_to_dict()
+        if self.journal:
+            self._append_journal([('set', [new_key], value)])
+            return
 
-        if not new_key in content.keys():
-            content.update({new_key: value})
-        else:
-            content[new_key] = value
+        with self._lock_exclusive():
+            # Apenas o primeiro nível é copiado, os outros valores não são alterados
+            # e passam a ser compartilhados com o novo conteúdo do cache.
+            content = dict(self._load())
+            content[new_key] = _json_copy(value)
+            self._write_content(content)
 
-        self.write_lines(content)
+    @instrumented('FileJson.update_many', path_attr='file_path_json')
+    def update_many(self, mapping: dict, *, sep: str=None) -> None:
+        """
+           Altera/Cria várias chaves com uma única leitura e uma única gravação do arquivo.
+        sep = Se informado, as chaves de mapping são caminhos para chaves aninhadas,
+              Ex: update_many({'app.version': '1.0'}, sep='.')
+        """
+        if self.journal:
+            self._append_journal(
+                [('set', [key] if sep is None else key.split(sep), value) for key, value in mapping.items()]
+            )
+            return
+
+        with self.transaction() as content:
+            for key, value in mapping.items():
+                if sep is None:
+                    content[key] = _json_copy(value)
+                else:
+                    set_nested(content, key, _json_copy(value), sep=sep)
 
+    @contextmanager
+    def transaction(self):
+        """
+           Lê o arquivo uma vez e retorna o conteúdo para ser alterado dentro do
+        bloco with, o arquivo é gravado uma única vez no fim do bloco (apenas se
+        o conteúdo foi alterado). Se o bloco gerar uma exceção nada é gravado.
+
+        with file_json.transaction() as cfg:
+            cfg['version'] = '1.0'
+            set_nested(cfg, 'paths.bin', '~/.local/bin')
+        """
+        with self._lock_exclusive():
+            original = self._load()
+            content = self._copy_content(original)
+            yield content
+            if content == original:
+                return
+
+            if self.journal:
+                # Apenas as chaves do primeiro nível que foram alteradas vão para o journal.
+                records = [
+                    ('set', [key], value) for key, value in content.items()
+                    if (not key in original) or (original[key] != value)
+                ]
+                records += [('del', [key], None) for key in original if not key in content]
+                self._append_journal(records)
+            else:
+                self._write_content(content)
+
+    @instrumented('FileJson.is_key', path_attr='file_path_json')
     def is_key(self, key: str) -> bool:
         """Verifica se uma chave/key existe no json"""
-        _keys = self.lines_to_dict().keys()
+        if self.lazy and self._can_scan() and (self._cached() is None):
+            _found = self._scan(lambda scanner: scanner.find_key(key))
+            return False if _found is None else _found
+        return key in self._load()
 
-        for json_key in self.lines_to_dict().keys():
-            if json_key == key:
-                return True
-                break
-        return False
+    @instrumented('FileJson.get_value', path_attr='file_path_json')
+    def get_value(self, key: str, default=None):
+        """
+           Retorna o valor de uma chave, ou default se a chave não existir.
+        key = Nome de uma chave do primeiro nível, ou um JSON pointer (RFC 6901)
+              iniciado com '/'. Ex: '/apps/0/name'
 
+        Com lazy=True o arquivo é percorrido apenas até o fim do valor procurado,
+        sem decodificar o restante do documento.
+        """
+        pointer = key if key.startswith('/') else '/' + key.replace('~', '~0').replace('/', '~1')
+        content = self._cached()
+        if self.lazy and (content is None) and self._can_scan():
+            _found = [False]
+
+            def _find(scanner: _JsonScanner):
+                if scanner.find_pointer(pointer):
+                    _found[0] = True
+                    return scanner.value()
+            value = self._scan(_find)
+            return value if _found[0] else default
+
+        value = self._load() if content is None else content
+        for token in _split_pointer(pointer):
+            if isinstance(value, dict) and (token in value):
+                value = value[token]
+            elif isinstance(value, list) and token.isdigit() and (int(token) < len(value)):
+                value = value[int(token)]
+            else:
+                return default
+        return _json_copy(value)
+
+    @instrumented('FileJson.get_lines', path_attr='file_path_json')
     def get_lines(self):
-        return json.dumps(self.lines_to_dict(), indent=4, ensure_ascii=False)
+        import json
+
+        return json.dumps(self._load(), indent=4, ensure_ascii=False)
+
+    def cache_info(self) -> dict:
+        """Retorna o número de leituras atendidas pelo cache (hits) e pelo disco (misses)."""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    def invalidate_cache(self) -> None:
+        """Descarta o conteúdo em cache, a próxima leitura será feita no disco."""
+        with self._journal_lock:
+            self._cache = None
+
+    def watch(self, callback=None, *, watcher=None) -> None:
+        """
+           Monitora o arquivo (e o journal), quando o arquivo for alterado o cache
+        é descartado e callback(self) é chamado (na thread do watcher).
+        watcher = Instância de watcher.FileWatcher (padrão get_default_watcher()).
+        """
+        from .watcher import get_default_watcher
+
+        if watcher is None:
+            watcher = get_default_watcher()
+
+        def _changed(path: str) -> None:
+            with self._journal_lock:
+                # Alterações feitas por esta instância já estão no cache (a chave
+                # do cache é a do arquivo atual), apenas as outras descartam o cache.
+                if (self._cache is None) or (self._current_key() != self._cache[1]):
+                    self.invalidate_cache()
+            if callback is not None:
+                callback(self)
+
+        for path in (self.file_path_json.path(), self.journal_path()):
+            watcher.watch(path, _changed)
+            self._watches.append((watcher, path, _changed))
+
+    def unwatch(self) -> None:
+        """Remove os callbacks registrados com watch()."""
+        for watcher, path, handler in self._watches:
+            watcher.unwatch(path, handler)
+        self._watches = []
+
+    def journal_path(self) -> str:
+        """Retorna o caminho do arquivo de journal."""
+        return self.file_path_json.path() + self.JOURNAL_SUFFIX
+
+    @instrumented('FileJson.compact_journal', path_attr='file_path_json')
+    def compact_journal(self) -> None:
+        """
+           Incorpora o journal ao arquivo .json e remove o journal. O arquivo .json
+        resultante é um json comum, que pode ser lido sem o journal.
+        """
+        with self._lock_exclusive(), self._journal_lock:
+            if not os.path.exists(self.journal_path()):
+                return
+            content = self._load()
+            # _write_content() remove o journal depois de gravar o arquivo .json.
+            self._write_content(content)
+
+    def _write_content(self, content: dict, *, cache: bool=True) -> None:
+        """
+           Grava content no arquivo. Se cache for True, content passa a ser o
+        conteúdo em cache e não deve mais ser alterado por quem chamou o método.
+        """
+        with self._journal_lock:
+            try:
+                _data = self.serializer.dumps(content)
+                _stat = write_file_atomic(
+                    self.file_path_json.path(),
+                    _data,
+                    durable=self.durable,
+                    encoding='utf8',
+                )
+                if self.journal:
+                    # O conteúdo do journal já está em content.
+                    try:
+                        remove(self.journal_path())
+                    except FileNotFoundError:
+                        pass
+                    self._journal_records = 0
+            except Exception as e:
+                self.invalidate_cache()
+                #print(__class__.__name__, e)
+                raise Exception(f'{__class__.__name__} {e}')
+
+            if self.cache and cache:
+                self._cache = (content, self._make_key(_stat, None), _data)
+            else:
+                self.invalidate_cache()
+
+    def _append_journal(self, records: list) -> None:
+        """
+           Adiciona records [(operação, [chaves], valor), ...] no journal. Se o
+        conteúdo em cache estiver atualizado, as alterações também são aplicadas no cache.
+        """
+        import json
+
+        data = ''.join(
+            json.dumps({'op': op, 'key': key, 'value': value}, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for op, key, value in records
+        ).encode('utf8')
+
+        # Adições no journal podem ser feitas ao mesmo tempo (O_APPEND), mas não
+        # durante compact_journal(), que usa a trava exclusiva.
+        with self._lock_shared(), self._journal_lock:
+            # A entrada do cache é guardada antes da gravação: o watcher (watch()) pode
+            # descartar o cache quando o journal é fechado.
+            _entry = self._cached_entry()
+            content = _entry[0] if _entry is not None else None
+            _cache_key = _entry[1] if _entry is not None else None
+            try:
+                with open(self.journal_path(), 'ab') as jfile:
+                    _old_size = jfile.tell()
+                    jfile.write(data)
+                    jfile.flush()
+                    if _instrumentation._enabled:
+                        _instrumentation.record_write(len(data))
+                    if self.durable:
+                        os.fsync(jfile.fileno())
+                    _stat = os.fstat(jfile.fileno())
+            except Exception as e:
+                self.invalidate_cache()
+                raise Exception(f'{__class__.__name__} {e}')
+
+            self._journal_records += len(records)
+            _journal_key = _cache_key[1] if _cache_key is not None else None
+            _old_journal_size = 0 if _journal_key is None else _journal_key[1]
+            if (_cache_key is not None) and (_old_size == _old_journal_size):
+                # Nenhum outro processo alterou o journal, o cache pode ser atualizado.
+                for op, key, value in records:
+                    _apply_journal_record(content, op, key, _json_copy(value))
+                # O json lido/gravado não tem mais o conteúdo do cache.
+                self._cache = (content, self._make_key(None, _stat, _cache_key[0]), None)
+            else:
+                self.invalidate_cache()
+
+            _compact = (self._journal_records >= self.journal_max_records) or \
+                (_stat.st_size >= self.journal_max_bytes)
+
+        if _compact:
+            if not self.background_compaction:
+                self.compact_journal()
+            elif (self._compaction_thread is None) or (not self._compaction_thread.is_alive()):
+                import threading
+
+                self._compaction_thread = threading.Thread(target=self.compact_journal, daemon=True)
+                self._compaction_thread.start()
+
+    @staticmethod
+    def _make_key(stat_json, stat_journal, key_json: tuple=None) -> tuple:
+        """
+           Chave do cache: (st_mtime_ns, st_size, st_ino) do arquivo .json e do journal.
+        key_json é usado quando stat_json for None.
+        """
+        if stat_json is not None:
+            key_json = (stat_json.st_mtime_ns, stat_json.st_size, stat_json.st_ino)
+        if stat_journal is None:
+            return (key_json, None)
+        return (key_json, (stat_journal.st_mtime_ns, stat_journal.st_size, stat_journal.st_ino))
+
+    def _lock_exclusive(self):
+        if not self.locking:
+            return nullcontext()
+        return self._lock.exclusive()
+
+    def _lock_shared(self):
+        """Trava compartilhada, usada apenas com journal (sem journal as leituras não usam trava)."""
+        if (not self.locking) or (not self.journal):
+            return nullcontext()
+        return self._lock.shared()
+
+    def _current_key(self) -> tuple:
+        try:
+            _stat = os.stat(self.file_path_json.path())
+        except OSError:
+            _stat = None
+        _stat_journal = None
+        if self.journal:
+            try:
+                _stat_journal = os.stat(self.journal_path())
+            except OSError:
+                pass
+        if (_stat is None) and (_stat_journal is None):
+            return None
+        return self._make_key(_stat, _stat_journal)
+
+    def _can_scan(self) -> bool:
+        """O arquivo pode ser percorrido sem decodificar (não existe journal pendente)."""
+        return (not self.journal) or (not os.path.exists(self.journal_path()))
+
+    def _cached(self) -> dict:
+        """Retorna o conteúdo em cache, se ele ainda for válido, ou None."""
+        _entry = self._cached_entry()
+        return _entry[0] if _entry is not None else None
+
+    def _cached_entry(self) -> tuple:
+        """Retorna a entrada (conteúdo, chave, json) do cache, se ela ainda for válida, ou None."""
+        _entry = self._cache
+        if (not self.cache) or (_entry is None):
+            return None
+        if self._current_key() != _entry[1]:
+            return None
+        self.cache_hits += 1
+        if _instrumentation._enabled:
+            _instrumentation.record_cache(True)
+        return _entry
+
+    def _scan(self, func):
+        """
+           Mapeia o arquivo na memória e retorna func(_JsonScanner), ou None se
+        o arquivo não puder ser lido.
+        """
+        import mmap
+
+        try:
+            with open(self.file_path_json.path(), 'rb') as jfile:
+                if os.fstat(jfile.fileno()).st_size == 0:
+                    raise ValueError('arquivo vazio')
+                with mmap.mmap(jfile.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    scanner = _JsonScanner(buffer)
+                    try:
+                        return func(scanner)
+                    finally:
+                        if _instrumentation._enabled:
+                            _instrumentation.record_read(scanner.pos)
+        except Exception as e:
+            print(__class__.__name__, e)
+            return None
+
+    def _load(self) -> dict:
+        """
+           Retorna o conteúdo do arquivo, usando o cache quando o arquivo não foi
+        alterado. O dicionário retornado pode ser o próprio cache, não altere.
+        """
+        content = self._cached()
+        if content is not None:
+            return content
+
+        self.cache_misses += 1
+        if _instrumentation._enabled:
+            _instrumentation.record_cache(False)
+        with self._lock_shared(), self._journal_lock:
+            try:
+                content, _key, _data = self._read()
+            except Exception as e:
+                print(__class__.__name__, e)
+                self.invalidate_cache()
+                return {}
+
+        if self.cache:
+            self._cache = (content, _key, _data)
+        return content
+
+    def _copy_content(self, content: dict) -> dict:
+        """Retorna uma cópia de content (o conteúdo retornado por _load())."""
+        _entry = self._cache
+        if (_entry is not None) and (_entry[0] is content) and (_entry[2] is not None):
+            return self.serializer.loads(_entry[2])
+        return _json_copy(content)
+
+    def _read(self) -> tuple:
+        """
+           Lê o arquivo .json (e o journal), retorna (conteúdo, chave do cache, json),
+        json é o arquivo lido, ou None se o conteúdo foi alterado pelo journal.
+        """
+        # O arquivo .json pode ser substituído por compact_journal() de outro processo
+        # entre a leitura do .json e do journal, nesse caso a leitura é repetida.
+        for _ in range(10):
+            try:
+                with open(self.file_path_json.path(), 'rb') as jfile:
+                    _stat = os.fstat(jfile.fileno())
+                    _data = jfile.read()
+                    if _instrumentation._enabled:
+                        _instrumentation.record_read(len(_data))
+                    content = self.serializer.loads(_data)
+            except FileNotFoundError:
+                # Apenas o journal existe (arquivo criado com update_key()).
+                if (not self.journal) or (not os.path.exists(self.journal_path())):
+                    raise
+                _stat, content, _data = None, {}, None
+
+            if not self.journal:
+                return content, self._make_key(_stat, None), _data
+
+            _stat_journal = self._replay_journal(content)
+            try:
+                _stat_now = os.stat(self.file_path_json.path())
+            except FileNotFoundError:
+                _stat_now = None
+            if ((_stat is None) and (_stat_now is None)) or \
+                    ((_stat is not None) and (_stat_now is not None) and (_stat.st_ino == _stat_now.st_ino)):
+                break
+        if self._journal_records > 0:
+            _data = None
+        return content, self._make_key(_stat, _stat_journal), _data
+
+    def _replay_journal(self, content: dict):
+        """Aplica o journal em content, retorna o os.stat_result do journal (ou None)."""
+        import json
+
+        self._journal_records = 0
+        try:
+            jfile = open(self.journal_path(), 'rb')
+        except FileNotFoundError:
+            return None
+
+        with jfile:
+            _stat = os.fstat(jfile.fileno())
+            for line in jfile:
+                try:
+                    record = json.loads(line)
+                    _apply_journal_record(content, record['op'], record['key'], record['value'])
+                except (ValueError, KeyError, TypeError):
+                    # Última linha incompleta (gravação interrompida).
+                    break
+                self._journal_records += 1
+            if _instrumentation._enabled:
+                _instrumentation.record_read(jfile.tell())
+        return _stat
         
 
 
@@ -337,21 +1981,30 @@ class PathUserDirs(object):
 
     def tempDir(self, *, create=False) -> str:
         """
-           Retorna um diretório temporário.
+           Retorna um diretório temporário no workspace em disco do processo
+        (veja workspace.get_disk_workspace()), removido no fim do processo.
+        O diretório só é criado com create=True.
         """
         if self.__temp_dir is None:
-            self.__temp_dir = TemporaryDirectory().name
-        if create:
-            mkdir(self.__temp_dir)
+            from .workspace import get_disk_workspace
 
+            self.__temp_dir = get_disk_workspace().make_dir(create=False)
+        if create:
+            os.makedirs(self.__temp_dir, mode=0o700, exist_ok=True)
         return self.__temp_dir
 
-    def tempFile(self, create=False) -> None:
+    def tempFile(self, create=False) -> str:
+        """
+           Retorna um arquivo temporário no workspace em disco do processo,
+        removido no fim do processo. O arquivo (vazio) só é criado com create=True.
+        """
         if self.__temp_file is None:
-            self.__temp_file = NamedTemporaryFile(delete=True).name
+            from .workspace import get_disk_workspace
+
+            self.__temp_file = get_disk_workspace().make_file(create=False)
         if create:
+            os.makedirs(os.path.dirname(self.__temp_file), mode=0o700, exist_ok=True)
             touch(self.__temp_file)
-
         return self.__temp_file
 
     def dirHome(self) -> str:
@@ -439,7 +2092,7 @@ class ConfDirsLinux(PathUserDirs):
         """Retorna a HOME do usuário."""
         if self.type_root:
             return '/root'
-        return os.path.abspath(Path().home())
+        return os.path.abspath(os.path.expanduser('~'))
 
     def fileBashRc(self) -> str:
         if self.type_root:
@@ -505,13 +2158,11 @@ class ConfDirsLinux(PathUserDirs):
            ~/.local/share/icons/hicolor/resol/apps
         """
         if self.type_root:
-            _path = self.dirIcons().split('/')
-            _path[5] = resol
-            return "/".join(_path)
-        else:
-            _path = self.dirIcons().split('/')
-            _path[6] = resol
-            return "/".join(_path)
+            # /usr/share/icons/hicolor/128x128/apps
+            _dir, _apps = os.path.split(self.dirIcons())
+            return os.path.join(os.path.dirname(_dir), resol, _apps)
+        # ~/.local/share/icons/128x128
+        return os.path.join(os.path.dirname(self.dirIcons()), resol)
 
     def getDirs(self) -> dict:
         
@@ -540,7 +2191,7 @@ class ConfDirsWindows(PathUserDirs):
 
     def dirHome(self) -> str:
         """Retorna a HOME do usuário."""
-        return os.path.abspath(Path().home())
+        return os.path.abspath(os.path.expanduser('~'))
         
     def dirGnupg(self) -> str:
         return get_abspath(os.path.join(self.dirHome(), '.gnupg'))
@@ -580,9 +2231,75 @@ class ConfDirsWindows(PathUserDirs):
 
 
 
+class DirsSnapshot(Mapping):
+    """
+       Mapeamento imutável com os diretórios de ConfDirs, no formato de getDirs()
+    ('HOME', 'DIR_BIN', 'DIR_CONFIG', ...). Os valores também podem ser lidos
+    como atributos, em minúsculo:
+
+    snapshot['DIR_BIN'] == snapshot.dir_bin
+    """
+    __slots__ = ('_dirs',)
+
+    def __init__(self, dirs: dict) -> None:
+        object.__setattr__(self, '_dirs', dict(dirs))
+
+    def __getitem__(self, key: str) -> str:
+        return self._dirs[key]
+
+    def __iter__(self):
+        return iter(self._dirs)
+
+    def __len__(self) -> int:
+        return len(self._dirs)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __getattr__(self, name: str) -> str:
+        try:
+            return self._dirs[name.upper()]
+        except KeyError:
+            raise AttributeError(f'{__class__.__name__} não tem o atributo {name}') from None
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'{__class__.__name__} é imutável')
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self._dirs!r})'
+
+
+
 class ConfDirs(object):
+    """
+       Diretórios de configuração do sistema atual (Linux ou Windows).
+
+       Os diretórios são calculados uma única vez e guardados em um DirsSnapshot
+    (snapshot()), que é recalculado quando type_root for alterado ou com refresh().
+    """
+    # Método -> chave do snapshot.
+    _LAYOUT: dict = {
+        'dirHome': 'HOME',
+        'dirDownloads': 'DIR_DOWNLOADS',
+        'dirBin': 'DIR_BIN',
+        'dirLib': 'DIR_LIB',
+        'dirIcons': 'DIR_ICONS',
+        'dirDesktopEntry': 'DIR_DESKTOP_ENTRY',
+        'dirThemes': 'DIR_THEMES',
+        'dirOptional': 'DIR_OPTIONAL',
+        'dirCache': 'DIR_CACHE',
+        'dirConfig': 'DIR_CONFIG',
+        'dirGnupg': 'DIR_GNUPG',
+        'fileBashRc': 'FILE_BASHRC',
+    }
+    # Métodos que retornam None em sistemas diferentes de Linux.
+    _LINUX_ONLY: tuple = ('dirDesktopEntry', 'dirThemes', 'dirLib', 'dirIcons', 'fileBashRc')
+
     def __init__(self, *, type_root:bool=False) -> None:
         #super().__init__(type_root=type_root) 
+        self._snapshot: DirsSnapshot = None
+        # Diretórios retornados por getDirs().
+        self._user_dirs: dict = None
         self.type_root = type_root
        
     @property
@@ -604,6 +2321,28 @@ class ConfDirs(object):
             exit(1)
 
         self.__conf_user_dirs.setDirs()
+        self._snapshot = None
+
+    def snapshot(self) -> DirsSnapshot:
+        """Retorna todos os diretórios em um DirsSnapshot (calculado uma única vez)."""
+        _snapshot = self._snapshot
+        if _snapshot is None:
+            _dirs = {}
+            for method, key in self._LAYOUT.items():
+                if (KERNEL_TYPE != 'Linux') and (method in self._LINUX_ONLY):
+                    _dirs[key] = None
+                else:
+                    _dirs[key] = getattr(self.__conf_user_dirs, method)()
+            # getDirs() retorna as mesmas chaves da classe do sistema atual.
+            self._user_dirs = self.__conf_user_dirs.getDirs()
+            _dirs.update(self._user_dirs)
+            _snapshot = self._snapshot = DirsSnapshot(_dirs)
+        return _snapshot
+
+    def refresh(self) -> DirsSnapshot:
+        """Descarta o snapshot atual, e calcula os diretórios novamente."""
+        self._snapshot = None
+        return self.snapshot()
 
     def tempDir(self, *, create:bool=False) -> str:
         """
@@ -611,60 +2350,61 @@ class ConfDirs(object):
         """
         return self.__conf_user_dirs.tempDir(create=create)
 
-    def tempFile(self, create: bool=False) -> None:
+    def tempFile(self, create: bool=False) -> str:
         """Retorna um arquivo temporário"""
         return self.__conf_user_dirs.tempFile(create=create)
 
+    def tempWorkspace(self):
+        """Retorna o workspace.TempWorkspace (em /dev/shm se houver espaço) usado por AppDirs.scratch_dir()."""
+        from .workspace import get_default_workspace
+
+        return get_default_workspace()
+
     def dirHome(self) -> str:
         """Retorna o diretório Home do usuário."""
-        return self.__conf_user_dirs.dirHome()
+        return (self._snapshot or self.snapshot())._dirs['HOME']
 
     def dirDownloads(self) -> str:
         """Retorna o diretório downloads do usuário."""
-        return self.__conf_user_dirs.dirDownloads()
+        return (self._snapshot or self.snapshot())._dirs['DIR_DOWNLOADS']
 
     def dirBin(self) -> str:
-        return self.__conf_user_dirs.dirBin()
+        return (self._snapshot or self.snapshot())._dirs['DIR_BIN']
 
     def dirOptional(self) -> str:
-        return self.__conf_user_dirs.dirOptional()
+        return (self._snapshot or self.snapshot())._dirs['DIR_OPTIONAL']
 
     def dirCache(self) -> str:
-        return self.__conf_user_dirs.dirCache()
+        return (self._snapshot or self.snapshot())._dirs['DIR_CACHE']
 
     def dirConfig(self) -> str:
-        return self.__conf_user_dirs.dirConfig()
+        return (self._snapshot or self.snapshot())._dirs['DIR_CONFIG']
+
+    def dirGnupg(self) -> str:
+        return (self._snapshot or self.snapshot())._dirs['DIR_GNUPG']
 
     def dirDesktopEntry(self) -> str:
-        if KERNEL_TYPE != 'Linux':
-            return None
-        return self.__conf_user_dirs.dirDesktopEntry()
+        return (self._snapshot or self.snapshot())._dirs['DIR_DESKTOP_ENTRY']
 
     def dirThemes(self) -> str:
-        if KERNEL_TYPE != 'Linux':
-            return None
-        return self.__conf_user_dirs.dirThemes()
+        return (self._snapshot or self.snapshot())._dirs['DIR_THEMES']
 
     def dirLib(self) -> str:
-        if KERNEL_TYPE != 'Linux':
-            return None
-        return self.__conf_user_dirs.dirLib()
+        return (self._snapshot or self.snapshot())._dirs['DIR_LIB']
 
     def dirIcons(self) -> str:
-        if KERNEL_TYPE != 'Linux':
-            return None
-        return self.__conf_user_dirs.dirIcons()
+        return (self._snapshot or self.snapshot())._dirs['DIR_ICONS']
 
     def fileBashRc(self) -> str:
-        if KERNEL_TYPE != 'Linux':
-            return None
-        return self.__conf_user_dirs.fileBashRc()
+        return (self._snapshot or self.snapshot())._dirs['FILE_BASHRC']
 
     def getDirIcons(self, resol: str):
         return self.__conf_user_dirs.getDirIcons(resol)
 
     def getDirs(self) -> dict:
-        return self.__conf_user_dirs.getDirs()
+        if self._snapshot is None:
+            self.snapshot()
+        return dict(self._user_dirs)
         
 
     def dirsJson(self):
@@ -673,6 +2413,8 @@ class ConfDirs(object):
         
         self.get_dirs(): dict -> self.get_dirs(): json
         """
+        import json
+
         return json.dumps(self.getDirs(), indent=4)
 
     def showDirs(self):
@@ -683,6 +2425,7 @@ class ConfDirs(object):
     
     def setDirs(self):
         self.__conf_user_dirs.setDirs()
+        self.refresh()
         
 
 #===============================================================#
@@ -690,10 +2433,12 @@ class ConfDirs(object):
 # Função para ser usada em sistemas Linux.
 def add_home_in_path() -> bool:
     '''
-       Configurar o arquivo .bashrc do usuário para inserir o diretório ~/.local/bin
-    na variável de ambiente $PATH. 
-    
-       Essa configuração será abortada caso ~/.local/bin já exista em ~/.bashrc ou exista na variável $PATH.
+       Configurar os arquivos ~/.bashrc, ~/.profile e ~/.zshrc do usuário (os que
+    existirem, veja rcfile.default_rc_files()) para inserir o diretório ~/.local/bin
+    na variável de ambiente $PATH.
+
+       Essa configuração será abortada caso ~/.local/bin já exista na variável $PATH,
+    arquivos onde ~/.local/bin já foi inserido não são alterados (veja rcfile.RcEditor).
     '''
     if KERNEL_TYPE != 'Linux':
         print(f'{__name__} ERRO ... sistema operacional não suportado.')
@@ -702,49 +2447,22 @@ def add_home_in_path() -> bool:
     if geteuid() == 0:
         print(f'{__name__} ERRO ... você não pode ser o "root."')
         return False
-    
-    
+
     confUserDirs: ConfDirs = ConfDirs(type_root=False)
 
     # Verificar se ~/.local/bin já está no PATH do usuário atual.
-    # os.environ
-    user_local_path = environ['PATH']
-    
-    for _dir in user_local_path.split(':'):
-        if _dir == confUserDirs.dirBin():
-            return True
-            break
-
-    file_bashrc_backup = confUserDirs.fileBashRc() + '.bak'
-    if not os.path.isfile(file_bashrc_backup):
-        print(f'Criando backup do arquivo {confUserDirs.fileBashRc()}')
-        copyfile(confUserDirs.fileBashRc(), file_bashrc_backup)
-
-    file_bash: FilePath = FilePath(confUserDirs.fileBashRc()) 
-    file_reader: FileReader = FileReader(file_bash)
-    content: list = file_reader.get_lines()
-
-    import re
-    RegExp = re.compile(r'{}.*{}'.format('^export PATH=', confUserDirs.dirBin()))
-    for line in content:
-        if (RegExp.findall(line) != []): # O arquivo já foi configurado anteriormente.
-            print(f'add_home_in_path(): arquivo {confUserDirs.fileBashRc()} já configurado.')
-            return True
-            break
-
-    # Inserir ~/.local/bin no arquivo ~/.bashrc
-    NewUserPath = f'export PATH={confUserDirs.dirBin()}:{user_local_path}'
-    content.append(NewUserPath)
-
-    # Escrever a nova lista no arquivo ~/.bashrc
-    file_reader.write_lines(content)
+    if confUserDirs.dirBin() in environ['PATH'].split(':'):
+        return True
 
-    del confUserDirs
-    del file_reader
-    del file_bash
-    del content
-    del re
+    from .rcfile import RcEditor
 
+    editor = RcEditor(block='apps_conf')
+    editor.add_path(confUserDirs.dirBin())
+    try:
+        editor.apply()
+    except Exception as e:
+        print(f'{__name__} ERRO ... {e}')
+        return False
     return True
 
 
@@ -767,6 +2485,9 @@ class AppDirs(object):
     @appname.setter
     def appname(self, new_appname: str) -> None:
         self._appname = new_appname
+        # Caminhos já calculados, válidos enquanto o snapshot de config_dirs não mudar.
+        self._paths: dict = {}
+        self._paths_snapshot: DirsSnapshot = None
 
     @property
     def type_root(self) -> bool:
@@ -781,6 +2502,17 @@ class AppDirs(object):
         
         self.config_dirs: ConfDirs = ConfDirs(type_root=self._type_root)
         self.config_dirs.setDirs()
+        self._paths = {}
+
+    def _cached_path(self, key: str, func) -> str:
+        """Retorna o caminho key, calculado com func() apenas na primeira vez."""
+        if self._paths_snapshot is not self.config_dirs._snapshot:
+            self._paths = {}
+            self._paths_snapshot = self.config_dirs.snapshot()
+        _path = self._paths.get(key)
+        if _path is None:
+            _path = self._paths[key] = func()
+        return _path
 
     def get_dirs(self):
         return {
@@ -791,27 +2523,39 @@ class AppDirs(object):
         }
 
     def dirlib(self) -> str:
-        return get_abspath(os.path.join(self.config_dirs.dirLib(), self.appname))
+        return self._cached_path(
+            'dirlib', lambda: get_abspath(os.path.join(self.config_dirs.dirLib(), self.appname))
+        )
 
     def dircache(self) -> str:
-        return get_abspath(os.path.join(self.config_dirs.dirCache(), self.appname))
+        return self._cached_path(
+            'dircache', lambda: get_abspath(os.path.join(self.config_dirs.dirCache(), self.appname))
+        )
 
     def dirconfig(self) -> str:
-        return get_abspath(os.path.join(self.config_dirs.dirConfig(), self.appname))
+        return self._cached_path(
+            'dirconfig', lambda: get_abspath(os.path.join(self.config_dirs.dirConfig(), self.appname))
+        )
 
     def appdir(self) -> str:
-        return get_abspath(os.path.join(self.config_dirs.dirOptional(), self.appname))
+        return self._cached_path(
+            'appdir', lambda: get_abspath(os.path.join(self.config_dirs.dirOptional(), self.appname))
+        )
 
     def fileconf(self) -> str:
         """Retorna o caminho de um arquivo .json no diretório de configuração"""
-        return get_abspath(os.path.join(self.dirconfig(), f'{self.appname}.json'))
+        return self._cached_path(
+            'fileconf', lambda: get_abspath(os.path.join(self.dirconfig(), f'{self.appname}.json'))
+        )
 
     def fileConfPath(self) -> FilePath:
         """Retorna uma instância de FilePath para o arquivo self.fileconf()"""
         return FilePath(self.fileconf())
 
     def script(self) -> str:
-        return get_abspath(os.path.join(self.config_dirs.dirBin(), self.appname))
+        return self._cached_path(
+            'script', lambda: get_abspath(os.path.join(self.config_dirs.dirBin(), self.appname))
+        )
 
     def scriptPath(self) -> FilePath:
         """Retorna uma instância de FilePath para o arquivo self.script()"""
@@ -827,16 +2571,57 @@ class AppDirs(object):
     def get_dir_icons(self, resol: str) -> str:
         return self.config_dirs.getDirIcons(resol)
 
+    def best_icon(self, min_size: int=128) -> str:
+        """
+           Retorna o icone instalado de appname com pelo menos min_size pixels (ou o
+        maior disponível), None se não houver. Veja icons.IconIndex.best_icon().
+        """
+        from .icons import get_default_index
+
+        return get_default_index().best_icon(self.appname, min_size)
+
+    def icon_resolutions(self) -> list:
+        """Retorna as resoluções dos icones instalados de appname (ex: ['48x48', '128x128'])."""
+        from .icons import get_default_index
+
+        return get_default_index().resolutions(self.appname)
+
     def get_temp_dir(self, *, create=False) -> str:
         """
            Retorna um diretório temporário.
         """
         return self.config_dirs.tempDir(create=create)
 
-    def get_temp_file(self, create=False) -> None:
+    def get_temp_file(self, create=False) -> str:
         """Retorna um arquivo temporário."""
         return self.config_dirs.tempFile(create=create)
 
+    def cache(self, **kwargs):
+        """
+           Retorna um cache.AppCache em dircache(), os argumentos (max_bytes,
+        max_entries, durable) são repassados para AppCache. A mesma instância é
+        retornada enquanto dircache() não mudar (os argumentos são aplicados nela).
+        """
+        from .cache import AppCache
+
+        _cache = getattr(self, '_app_cache', None)
+        if (_cache is None) or (_cache.directory != self.dircache()):
+            _cache = self._app_cache = AppCache(self.dircache(), **kwargs)
+        else:
+            for name, value in kwargs.items():
+                setattr(_cache, name, value)
+        return _cache
+
+    def scratch_dir(self):
+        """
+           Context manager com um diretório temporário vazio, que é esvaziado e
+        reaproveitado no fim do bloco (veja workspace.TempWorkspace.scratch_dir()).
+
+        with app.scratch_dir() as tmp:
+            ...
+        """
+        return self.config_dirs.tempWorkspace().scratch_dir()
+
     def desktop_entry(self, file_desktop) -> str:
         """
         A extensão .desktop é adicionada automáticamente.
@@ -848,6 +2633,22 @@ class AppDirs(object):
 
         return get_abspath(os.path.join(self.config_dirs.dirDesktopEntry(), file_desktop))
 
+    def installed_desktop_entry(self) -> str:
+        """Retorna o arquivo <appname>.desktop instalado (do usuário ou do sistema), ou None."""
+        from .icons import get_default_index
+
+        return get_default_index().desktop_entry(self.appname)
+
+    def installed_info(self) -> dict:
+        """
+           Retorna as informações de appname no registro de aplicativos instalados
+        (appdir, script, desktop_entry, config, size), ou None se appdir() não
+        existir. Veja registry.AppRegistry.get().
+        """
+        from .registry import get_registry
+
+        return get_registry(type_root=self.type_root).get(self.appname)
+
     def desktopEntryPath(self, file_desktop: str) -> FilePath:
         """Retorna uma instância de FilePath para o arquivo self.desktop_entry()"""
         return FilePath(self.desktop_entry(file_desktop))
@@ -858,22 +2659,36 @@ class AppDirs(object):
             print(f'{_key}'.ljust(19), end=' ')
             print(_dirs[_key])
 
-    def create_dirs(self) -> bool:
+    def _provision_paths(self, report: ProvisionReport) -> list:
+        """Diretórios de config_dirs e do aplicativo, as entradas FILE_* vão para report.skipped."""
+        paths = []
+        for _dirs in (self.config_dirs.getDirs(), self.get_dirs()):
+            for KEY in _dirs:
+                if KEY.startswith('FILE_') or self.type_root:
+                    report.skipped.append(_dirs[KEY])
+                else:
+                    paths.append(_dirs[KEY])
+        return paths
+
+    def create_dirs(self) -> ProvisionReport:
         """
-         Cria os diretórios de configuração.
+         Cria os diretórios de configuração e retorna um ProvisionReport.
+        Com type_root=True nenhum diretório é criado (todos vão para report.skipped).
         """
-        if self.type_root:
-            return False
-
-        _dirs = self.config_dirs.getDirs()
-        _appdirs = self.get_dirs()
-
-        for KEY in _dirs:          
-            mkdir(_dirs[KEY])
-
-        for KEY in _appdirs:          
-            mkdir(_appdirs[KEY])
+        return __class__.create_many([self])
 
+    @staticmethod
+    def create_many(apps) -> ProvisionReport:
+        """
+           Cria os diretórios de vários AppDirs em uma única passagem, os diretórios
+        comuns (DIR_BIN, DIR_CONFIG, ...) são criados/verificados apenas uma vez.
+        """
+        report = ProvisionReport()
+        paths = []
+        for app in apps:
+            paths.extend(app._provision_paths(report))
+        report.skipped = list(dict.fromkeys(report.skipped))
+        return provision_dirs(paths, report=report)
 
 
 
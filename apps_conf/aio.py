@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Versões asyncio de FileReader e FileJson.
+
+   As operações de disco são executadas em um ThreadPoolExecutor com um número
+limitado de threads (veja configure()), o loop de eventos não é bloqueado.
+Gravações no mesmo arquivo são serializadas com uma trava asyncio por caminho
+(por loop), duas tarefas que chamam update_key() no mesmo arquivo nunca perdem
+uma alteração. Entre processos use FileJson(locking=True), veja FileLock.
+
+    reader = AsyncFileReader(FilePath(os.path.expanduser('~/.bashrc')))
+    lines = await reader.get_lines()
+    async for line in reader:
+        ...
+
+    config = AsyncFileJson(FilePath('config.json'))
+    await config.update_key('version', '1.0')
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import os
+import threading
+import weakref
+
+from .__main__ import FileJson, FilePath, FileReader
+
+
+# Número padrão de threads do executor compartilhado.
+DEFAULT_MAX_WORKERS: int = min(8, (os.cpu_count() or 1) + 4)
+
+_executor: ThreadPoolExecutor = None
+_max_workers: int = DEFAULT_MAX_WORKERS
+_executor_lock = threading.Lock()
+# loop -> {caminho: asyncio.Lock}
+_path_locks = weakref.WeakKeyDictionary()
+
+
+def configure(*, max_workers: int=DEFAULT_MAX_WORKERS) -> None:
+    """
+       Define o número de threads do executor compartilhado. O executor atual
+    (se existir) é encerrado depois de concluir as operações pendentes.
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        _old, _executor, _max_workers = _executor, None, max_workers
+    if _old is not None:
+        _old.shutdown(wait=False)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o executor compartilhado por AsyncFileReader e AsyncFileJson."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='apps_conf.aio')
+        return _executor
+
+
+def path_lock(path: str) -> asyncio.Lock:
+    """Retorna a trava (do loop atual) usada para serializar as gravações em path."""
+    loop = asyncio.get_running_loop()
+    locks = _path_locks.get(loop)
+    if locks is None:
+        locks = _path_locks[loop] = {}
+    path = os.path.realpath(path)
+    lock = locks.get(path)
+    if lock is None:
+        lock = locks[path] = asyncio.Lock()
+    return lock
+
+
+class _AsyncFile(object):
+    def __init__(self, executor: ThreadPoolExecutor) -> None:
+        super().__init__()
+        # executor: None = executor compartilhado (get_executor()).
+        self.executor: ThreadPoolExecutor = executor
+
+    def _path(self) -> str:
+        pass
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor or get_executor(), partial(func, *args, **kwargs))
+
+    async def _run_locked(self, func, *args, **kwargs):
+        lock = path_lock(self._path())
+        await lock.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor or get_executor(), partial(func, *args, **kwargs)
+            )
+        except BaseException:
+            lock.release()
+            raise
+        # A trava só é liberada quando a gravação termina na thread, mesmo se a
+        # tarefa for cancelada antes (shield() não cancela a gravação).
+        future.add_done_callback(lambda _future: lock.release())
+        return await asyncio.shield(future)
+
+
+class AsyncFileReader(_AsyncFile):
+    """
+       FileReader com métodos async. Os argumentos de palavra-chave (buffer_size,
+    persist_index, durable) são repassados para FileReader.
+
+    async for line in reader - Lê as linhas em lotes de batch_size linhas (veja iter_lines()).
+    """
+    def __init__(self, file_path: FilePath, *, executor: ThreadPoolExecutor=None, **kwargs) -> None:
+        super().__init__(executor)
+        self.reader: FileReader = FileReader(file_path, **kwargs)
+
+    @property
+    def file_path(self) -> FilePath:
+        return self.reader.file_path
+
+    def _path(self) -> str:
+        return self.reader.file_path.path()
+
+    async def get_lines(self) -> list:
+        return await self._run(self.reader.get_lines)
+
+    async def write_lines(self, lines: list) -> None:
+        return await self._run_locked(self.reader.write_lines, lines)
+
+    async def append_lines(self, lines: list) -> None:
+        return await self._run_locked(self.reader.append_lines, lines)
+
+    async def find_text(self, text: str, **kwargs) -> list:
+        return await self._run(self.reader.find_text, text, **kwargs)
+
+    async def find_many(self, patterns, **kwargs) -> dict:
+        return await self._run(self.reader.find_many, list(patterns), **kwargs)
+
+    async def contains_any(self, patterns, **kwargs) -> bool:
+        return await self._run(self.reader.contains_any, list(patterns), **kwargs)
+
+    async def is_text(self, text: str, **kwargs) -> bool:
+        return await self._run(self.reader.is_text, text, **kwargs)
+
+    async def line_count(self) -> int:
+        return await self._run(self.reader.line_count)
+
+    async def get_line(self, n: int) -> str:
+        return await self._run(self.reader.get_line, n)
+
+    async def get_range(self, start: int, stop: int) -> list:
+        return await self._run(self.reader.get_range, start, stop)
+
+    async def iter_lines(self, *, batch_size: int=1000):
+        """
+           Gerador assíncrono com as linhas do arquivo. As linhas são lidas no
+        executor em lotes de batch_size linhas, uma tarefa no executor por lote.
+        """
+        lines = self.reader.iter_lines()
+
+        def _next_batch() -> list:
+            batch = []
+            for line in lines:
+                batch.append(line)
+                if len(batch) == batch_size:
+                    break
+            return batch
+
+        try:
+            while True:
+                batch = await self._run(_next_batch)
+                for line in batch:
+                    yield line
+                if len(batch) < batch_size:
+                    break
+        finally:
+            await self._run(lines.close)
+
+    def __aiter__(self):
+        return self.iter_lines()
+
+
+class AsyncFileJson(_AsyncFile):
+    """
+       FileJson com métodos async. Os argumentos de palavra-chave (cache, lazy,
+    journal, locking ...) são repassados para FileJson.
+    """
+    def __init__(self, file_path_json: FilePath, *, executor: ThreadPoolExecutor=None, **kwargs) -> None:
+        super().__init__(executor)
+        self.file_json: FileJson = FileJson(file_path_json, **kwargs)
+
+    @property
+    def file_path_json(self) -> FilePath:
+        return self.file_json.file_path_json
+
+    def _path(self) -> str:
+        return self.file_json.file_path_json.path()
+
+    async def _read(self, func, *args):
+        # Sem journal as leituras não usam a trava: FileJson substitui a entrada do cache
+        # (conteúdo, chave, json) de uma só vez, uma leitura vê o cache anterior ou o
+        # novo. Com journal=True as gravações alteram o conteúdo do cache no lugar, as
+        # leituras também usam a trava.
+        if self.file_json.journal:
+            return await self._run_locked(func, *args)
+        return await self._run(func, *args)
+
+    async def lines_to_dict(self) -> dict:
+        return await self._read(self.file_json.lines_to_dict)
+
+    async def get_lines(self) -> str:
+        return await self._read(self.file_json.get_lines)
+
+    async def is_key(self, key: str) -> bool:
+        return await self._read(self.file_json.is_key, key)
+
+    async def get_value(self, key: str, default=None):
+        return await self._read(self.file_json.get_value, key, default)
+
+    async def write_lines(self, new_lines: dict) -> None:
+        return await self._run_locked(self.file_json.write_lines, new_lines)
+
+    async def update_key(self, new_key: str, value) -> None:
+        return await self._run_locked(self.file_json.update_key, new_key, value)
+
+    async def update_many(self, mapping: dict, *, sep: str=None) -> None:
+        return await self._run_locked(self.file_json.update_many, mapping, sep=sep)
+
+    async def compact_journal(self) -> None:
+        return await self._run_locked(self.file_json.compact_journal)
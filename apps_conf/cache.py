@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Cache de arquivos com limite de tamanho e de entradas, e remoção LRU (as
+entradas usadas há mais tempo são removidas primeiro). Usado por AppDirs.cache()
+no diretório AppDirs.dircache().
+
+    cache = AppCache('~/.cache/meu_app', max_bytes=512 * 1024 * 1024)
+    cache.put('pacote-1.0.tar.gz', data)
+    data = cache.get('pacote-1.0.tar.gz')
+    path = cache.get_path('pacote-1.0.tar.gz')   # sem ler o arquivo
+
+   Os arquivos ficam em <diretório>/data, o índice (chave, arquivo, tamanho e
+último acesso) fica em <diretório>/index.db (sqlite3). O tamanho total e o número
+de entradas são atualizados a cada put()/delete(), o diretório nunca é percorrido.
+Os acessos de get() são gravados no índice em lotes (veja TOUCH_BATCH).
+"""
+
+from hashlib import sha1
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+
+
+DEFAULT_MAX_BYTES: int = 1024 * 1024 * 1024
+DEFAULT_MAX_ENTRIES: int = 100_000
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL,
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+'''
+
+
+class AppCache(object):
+    """
+       Cache de arquivos em directory.
+
+    put(key, data)         - Grava data (bytes), retorna False se data for maior que max_bytes.
+    put_file(key, path)    - Copia (ou move, com move=True) o arquivo path para o cache.
+    get(key)               - Retorna os bytes de key, ou None.
+    get_path(key)          - Retorna o caminho do arquivo de key, ou None.
+    delete(key) / clear()  - Remove uma entrada / todas as entradas.
+    info()                 - {'bytes', 'entries', 'max_bytes', 'max_entries'}.
+
+    max_bytes/max_entries = Limites, ao passar de um deles as entradas menos
+                            usadas são removidas.
+    """
+    # Número de acessos de get() mantidos na memória antes de gravar no índice.
+    TOUCH_BATCH: int = 256
+    # Número de entradas removidas por consulta durante a remoção LRU.
+    EVICT_BATCH: int = 64
+
+    def __init__(
+                self, directory: str, *, max_bytes: int=DEFAULT_MAX_BYTES, max_entries: int=DEFAULT_MAX_ENTRIES,
+                durable: bool=False
+            ) -> None:
+        super().__init__()
+        self.directory: str = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes: int = max_bytes
+        self.max_entries: int = max_entries
+        # durable: fsync() dos arquivos gravados e do diretório antes de put() retornar.
+        self.durable: bool = durable
+        self._data_dir: str = os.path.join(self.directory, 'data')
+        os.makedirs(self._data_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        # chave -> último acesso, ainda não gravado no índice.
+        self._touched: dict = {}
+        self._db = sqlite3.connect(
+            os.path.join(self.directory, 'index.db'), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        return self.info()['entries']
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def info(self) -> dict:
+        with self._lock:
+            _bytes, entries = self._db.execute('SELECT bytes, entries FROM totals').fetchone()
+        return {'bytes': _bytes, 'entries': entries, 'max_bytes': self.max_bytes, 'max_entries': self.max_entries}
+
+    def _file_of(self, key: str) -> str:
+        """Nome do arquivo de key, relativo a data/ (dois níveis, para não ter diretórios enormes)."""
+        digest = sha1(key.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(digest[:2], digest)
+
+    def get_path(self, key: str) -> str:
+        with self._lock:
+            row = self._db.execute('SELECT file FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._touch(key)
+        return os.path.join(self._data_dir, row[0])
+
+    def get(self, key: str) -> bytes:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            # Arquivo removido fora do cache.
+            self.delete(key)
+            return None
+
+    def put(self, key: str, data: bytes) -> bool:
+        if len(data) > self.max_bytes:
+            return False
+        _file = self._file_of(key)
+        tmp = self._write_temp(_file, data=data)
+        self._commit(key, _file, tmp)
+        return True
+
+    def put_file(self, key: str, source: str, *, move: bool=False) -> bool:
+        size = os.path.getsize(source)
+        if size > self.max_bytes:
+            return False
+        _file = self._file_of(key)
+        if move:
+            try:
+                # Mesmo sistema de arquivos: source é movido direto para o cache.
+                self._commit(key, _file, source)
+                return True
+            except OSError:
+                pass
+        tmp = self._write_temp(_file, source=source)
+        self._commit(key, _file, tmp)
+        if move:
+            os.remove(source)
+        return True
+
+    def _write_temp(self, _file: str, *, data: bytes=None, source: str=None) -> str:
+        """
+           Grava data (ou uma cópia de source) em um arquivo temporário no diretório
+        de _file, retorna o caminho do temporário (veja _commit()).
+        """
+        from tempfile import mkstemp
+
+        _dir = os.path.dirname(os.path.join(self._data_dir, _file))
+        os.makedirs(_dir, exist_ok=True)
+        fd, tmp = mkstemp(dir=_dir, prefix='.', suffix='.tmp')
+        try:
+            with open(fd, 'wb') as file:
+                if source is None:
+                    file.write(data)
+                else:
+                    with open(source, 'rb') as _source:
+                        shutil.copyfileobj(_source, file, 1024 * 1024)
+                if self.durable:
+                    file.flush()
+                    os.fsync(file.fileno())
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return tmp
+
+    def _commit(self, key: str, _file: str, tmp: str) -> None:
+        """
+           Substitui o arquivo de key por tmp e atualiza o índice, as duas etapas
+        com a trava: um get() nunca lê um arquivo incompleto, e um delete()/evict()
+        da mesma chave acontece antes (e remove o arquivo antigo) ou depois (e
+        remove o novo arquivo junto com a entrada do índice).
+        """
+        path = os.path.join(self._data_dir, _file)
+        with self._lock:
+            size = os.stat(tmp).st_size
+            os.replace(tmp, path)
+            try:
+                self._index(key, _file, size)
+            except BaseException:
+                self._remove_file(_file)
+                raise
+        if self.durable:
+            _dirfd = os.open(os.path.dirname(path), os.O_RDONLY)
+            try:
+                os.fsync(_dirfd)
+            finally:
+                os.close(_dirfd)
+        self.evict()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._touched.pop(key, None)
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute('SELECT file, size FROM entries WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                    self._db.execute('UPDATE totals SET bytes = bytes - ?, entries = entries - 1', (row[1],))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            if row is None:
+                return False
+            self._remove_file(row[0])
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._touched = {}
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.execute('DELETE FROM entries')
+            self._db.execute('UPDATE totals SET bytes = 0, entries = 0')
+            self._db.execute('COMMIT')
+            shutil.rmtree(self._data_dir, ignore_errors=True)
+            os.makedirs(self._data_dir, exist_ok=True)
+
+    def flush(self) -> None:
+        """Grava no índice os acessos pendentes de get()."""
+        with self._lock:
+            if self._touched == {}:
+                return
+            touched, self._touched = self._touched, {}
+            self._db.execute('BEGIN IMMEDIATE')
+            self._db.executemany(
+                'UPDATE entries SET atime = ? WHERE key = ?', [(atime, key) for key, atime in touched.items()]
+            )
+            self._db.execute('COMMIT')
+
+    def evict(self) -> int:
+        """Remove as entradas menos usadas até respeitar max_bytes/max_entries, retorna quantas foram removidas."""
+        removed = []
+        with self._lock:
+            self.flush()
+            _bytes, entries = self._db.execute('SELECT bytes, entries FROM totals').fetchone()
+            if (_bytes <= self.max_bytes) and (entries <= self.max_entries):
+                return 0
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                while (_bytes > self.max_bytes) or (entries > self.max_entries):
+                    rows = self._db.execute(
+                        'SELECT key, file, size FROM entries ORDER BY atime LIMIT ?', (self.EVICT_BATCH,)
+                    ).fetchall()
+                    if rows == []:
+                        break
+                    for key, _file, size in rows:
+                        if (_bytes <= self.max_bytes) and (entries <= self.max_entries):
+                            break
+                        self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                        _bytes -= size
+                        entries -= 1
+                        removed.append(_file)
+                self._db.execute('UPDATE totals SET bytes = ?, entries = ?', (_bytes, entries))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            # Os arquivos são removidos depois do COMMIT, ainda com a trava (um put()
+            # da mesma chave não pode gravar o arquivo antes da remoção).
+            for _file in removed:
+                self._remove_file(_file)
+        return len(removed)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is None:
+                return
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def _touch(self, key: str) -> None:
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.TOUCH_BATCH:
+            self.flush()
+
+    def _index(self, key: str, _file: str, size: int) -> None:
+        with self._lock:
+            self._touched.pop(key, None)
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                self._db.execute(
+                    'INSERT OR REPLACE INTO entries (key, file, size, atime) VALUES (?, ?, ?, ?)',
+                    (key, _file, size, time.time())
+                )
+                if row is None:
+                    self._db.execute('UPDATE totals SET bytes = bytes + ?, entries = entries + 1', (size,))
+                else:
+                    self._db.execute('UPDATE totals SET bytes = bytes + ?', (size - row[0],))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def _remove_file(self, _file: str) -> None:
+        try:
+            os.remove(os.path.join(self._data_dir, _file))
+        except FileNotFoundError:
+            pass
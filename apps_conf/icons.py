@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Índice dos icones (tema hicolor) e dos arquivos .desktop instalados.
+
+   Os diretórios de resolução (16x16, 128x128, 128x128@2, scalable ...) e os
+diretórios de arquivos .desktop são lidos uma única vez com os.scandir(), o
+índice guarda aplicativo -> {resolução: arquivo} e aplicativo -> arquivo .desktop.
+Depois disso refresh() apenas consulta o mtime de cada diretório e lê novamente
+só os diretórios alterados (um arquivo adicionado/removido altera o mtime do
+diretório). As consultas são consultas a dicionários, sem percorrer diretórios.
+
+    index = get_default_index()
+    index.best_icon('firefox', min_size=128)   # '/usr/share/icons/hicolor/128x128/apps/firefox.png'
+    index.resolutions('firefox')               # ['16x16', '32x32', '128x128', 'scalable']
+    index.desktop_entry('firefox')             # '/usr/share/applications/firefox.desktop'
+
+   Os diretórios de icones são modelos com '{size}' no lugar da resolução, ex:
+'/usr/share/icons/hicolor/{size}/apps' (veja default_icon_dirs()).
+"""
+
+import os
+import threading
+import time
+
+
+# Extensões de icones, na ordem de preferência dentro do mesmo diretório.
+ICON_EXTENSIONS = ('.png', '.svg', '.svgz', '.xpm')
+# Nome do diretório de icones vetoriais.
+SCALABLE = 'scalable'
+# Diretórios alterados há menos de RACY_SECONDS são lidos novamente no próximo
+# refresh() (um arquivo criado no mesmo instante da leitura não altera o mtime).
+RACY_SECONDS: float = 2.0
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def parse_resolution(name: str) -> int:
+    """
+       Retorna o tamanho efetivo (em pixels) de um diretório de resolução
+    ('128x128' = 128, '64x64@2' = 128), float('inf') para 'scalable' ou None
+    se name não for um diretório de resolução.
+    """
+    if name == SCALABLE:
+        return float('inf')
+    size, _, scale = name.partition('@')
+    width, x, height = size.partition('x')
+    if (x != 'x') or (width != height) or (not width.isdigit()):
+        return None
+    if scale == '':
+        return int(width)
+    if not scale.isdigit():
+        return None
+    return int(width) * int(scale)
+
+
+def default_icon_dirs() -> list:
+    """
+       Modelos dos diretórios de icones do usuário e do sistema (nesta ordem de
+    prioridade), obtidos de ConfDirs.getDirIcons().
+    """
+    from .__main__ import ConfDirs
+
+    templates = []
+    for type_root in (False, True):
+        template = ConfDirs(type_root=type_root).getDirIcons('{size}')
+        if template is not None:
+            templates.append(template)
+    # Local padrão (XDG) dos icones do usuário, além do usado por ConfDirs.
+    templates.insert(1, os.path.join(os.path.expanduser('~'), '.local', 'share', 'icons', 'hicolor', '{size}', 'apps'))
+    return list(dict.fromkeys(templates))
+
+
+def default_desktop_dirs() -> list:
+    """Diretórios de arquivos .desktop do usuário e do sistema (nesta ordem de prioridade)."""
+    from .__main__ import ConfDirs
+
+    _dirs = [ConfDirs(type_root=type_root).dirDesktopEntry() for type_root in (False, True)]
+    return list(dict.fromkeys(d for d in _dirs if d is not None))
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _is_racy(mtime: int) -> bool:
+    return (mtime is not None) and (time.time_ns() - mtime < RACY_SECONDS * 1e9)
+
+
+def _scan_files(path: str, extensions: tuple) -> dict:
+    """Retorna {nome sem extensão: caminho} dos arquivos de path com uma das extensões."""
+    found = {}
+    try:
+        entries = os.scandir(path)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            if not ext in extensions:
+                continue
+            _old = found.get(name)
+            if (_old is not None) and (extensions.index(os.path.splitext(_old)[1]) <= extensions.index(ext)):
+                continue
+            try:
+                if entry.is_dir():
+                    continue
+            except OSError:
+                continue
+            found[name] = entry.path
+    return found
+
+
+class IconIndex(object):
+    """
+       Índice de icones e arquivos .desktop.
+
+    best_icon(app, min_size)  - Menor icone com pelo menos min_size pixels, ou o maior disponível.
+    resolutions(app)          - Resoluções disponíveis para app.
+    icons(app)                - {resolução: arquivo} de app.
+    desktop_entry(app)        - Arquivo <app>.desktop instalado, ou None.
+    refresh(force=False)      - Lê novamente os diretórios alterados.
+
+    icon_dirs = Modelos dos diretórios de icones (padrão default_icon_dirs()).
+    desktop_dirs = Diretórios de arquivos .desktop (padrão default_desktop_dirs()).
+    Em ambos os casos o primeiro diretório tem prioridade sobre os seguintes.
+    max_age = As consultas chamam refresh() se a última verificação tiver mais
+              de max_age segundos, None = apenas com refresh().
+    """
+    def __init__(self, icon_dirs: list=None, desktop_dirs: list=None, *, max_age: float=5.0) -> None:
+        super().__init__()
+        if icon_dirs is None:
+            icon_dirs = default_icon_dirs()
+        if desktop_dirs is None:
+            desktop_dirs = default_desktop_dirs()
+        # (diretório do tema, sufixo), ex: ('/usr/share/icons/hicolor', 'apps')
+        self._templates: list = []
+        for template in icon_dirs:
+            prefix, _, suffix = os.path.abspath(os.path.expanduser(template)).partition('{size}')
+            self._templates.append((prefix.rstrip(os.sep) or os.sep, suffix.strip(os.sep)))
+        self.desktop_dirs: list = [os.path.abspath(os.path.expanduser(d)) for d in desktop_dirs]
+        self.max_age: float = max_age
+        self._lock = threading.RLock()
+        self._checked: float = None
+        # diretório -> mtime_ns da última leitura (None = ler novamente)
+        self._mtimes: dict = {}
+        # diretório do tema -> {diretório de resolução: (resolução, tamanho)}
+        self._res_dirs: dict = {}
+        # diretório -> {nome: arquivo}
+        self._files: dict = {}
+        # Índices derivados de _files, reconstruídos quando algum diretório muda.
+        self._icons: dict = {}
+        self._desktop: dict = {}
+        self._best: dict = {}
+
+    def refresh(self, *, force: bool=False) -> bool:
+        """Lê novamente os diretórios alterados (todos com force=True), retorna True se algo mudou."""
+        with self._lock:
+            if force:
+                self._mtimes = {}
+            changed = False
+            for theme_dir, suffix in self._templates:
+                if self._changed(theme_dir):
+                    changed = True
+                    self._res_dirs[theme_dir] = self._scan_theme(theme_dir, suffix)
+                for res_dir in self._res_dirs.get(theme_dir, {}):
+                    if self._changed(res_dir):
+                        changed = True
+                        self._files[res_dir] = _scan_files(res_dir, ICON_EXTENSIONS)
+            for desktop_dir in self.desktop_dirs:
+                if self._changed(desktop_dir):
+                    changed = True
+                    self._files[desktop_dir] = _scan_files(desktop_dir, ('.desktop',))
+            if changed:
+                self._rebuild()
+            self._checked = time.monotonic()
+        return changed
+
+    def _changed(self, path: str) -> bool:
+        """Verifica o mtime de path, e o registra se path mudou desde a última leitura."""
+        mtime = _mtime(path)
+        if (path in self._mtimes) and (self._mtimes[path] == mtime):
+            return False
+        # Um diretório alterado agora pode mudar de novo sem alterar o mtime.
+        self._mtimes[path] = None if _is_racy(mtime) else mtime
+        return True
+
+    def _scan_theme(self, theme_dir: str, suffix: str) -> dict:
+        res_dirs = {}
+        try:
+            entries = os.scandir(theme_dir)
+        except OSError:
+            return res_dirs
+        with entries:
+            for entry in entries:
+                size = parse_resolution(entry.name)
+                if size is None:
+                    continue
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                res_dirs[os.path.join(entry.path, suffix) if suffix else entry.path] = (entry.name, size)
+        # Diretórios de resolução removidos.
+        for res_dir in set(self._res_dirs.get(theme_dir, {})) - set(res_dirs):
+            self._files.pop(res_dir, None)
+            self._mtimes.pop(res_dir, None)
+        return res_dirs
+
+    def _rebuild(self) -> None:
+        icons = {}
+        # Os diretórios de menor prioridade primeiro, os seguintes sobrescrevem.
+        for theme_dir, _ in reversed(self._templates):
+            for res_dir, resolution in self._res_dirs.get(theme_dir, {}).items():
+                for name, path in self._files.get(res_dir, {}).items():
+                    icons.setdefault(name, {})[resolution] = path
+        # app -> [(tamanho, resolução, arquivo)] em ordem de tamanho.
+        self._icons = {
+            name: sorted((size, resolution, path) for (resolution, size), path in found.items())
+            for name, found in icons.items()
+        }
+        desktop = {}
+        for desktop_dir in reversed(self.desktop_dirs):
+            desktop.update(self._files.get(desktop_dir, {}))
+        self._desktop = desktop
+        self._best = {}
+
+    def _check(self) -> None:
+        if (self._checked is None) or ((self.max_age is not None) and (time.monotonic() - self._checked > self.max_age)):
+            self.refresh()
+
+    def best_icon(self, app: str, min_size: int=128) -> str:
+        """
+           Retorna o icone de app com o menor tamanho >= min_size, o icone
+        'scalable' se não houver, ou o maior icone disponível. None se app não
+        tiver icones.
+        """
+        self._check()
+        key = (app, min_size)
+        try:
+            return self._best[key]
+        except KeyError:
+            pass
+        found = self._icons.get(app)
+        if found is None:
+            return None
+        best = found[-1][2]
+        for size, _, path in found:
+            if size >= min_size:
+                best = path
+                break
+        self._best[key] = best
+        return best
+
+    def resolutions(self, app: str) -> list:
+        """Retorna as resoluções disponíveis para app (ex: ['48x48', '128x128', 'scalable'])."""
+        self._check()
+        return [resolution for _, resolution, _ in self._icons.get(app, ())]
+
+    def icons(self, app: str) -> dict:
+        """Retorna {resolução: arquivo} dos icones de app."""
+        self._check()
+        return {resolution: path for _, resolution, path in self._icons.get(app, ())}
+
+    def desktop_entry(self, app: str) -> str:
+        """Retorna o arquivo <app>.desktop instalado (o do usuário tem prioridade), ou None."""
+        self._check()
+        if app.endswith('.desktop'):
+            app = app[:-8]
+        return self._desktop.get(app)
+
+    def apps(self) -> set:
+        """Nomes com icones ou arquivos .desktop no índice."""
+        self._check()
+        return set(self._icons) | set(self._desktop)
+
+    def __contains__(self, app: str) -> bool:
+        self._check()
+        return (app in self._icons) or (app in self._desktop)
+
+
+def get_default_index() -> IconIndex:
+    """Retorna o IconIndex compartilhado pelo processo (usado por AppDirs)."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = IconIndex()
+        return _default_index
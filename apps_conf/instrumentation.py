@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Instrumentação opcional das operações de E/S de FileReader e FileJson.
+
+   Desativada por padrão: cada método instrumentado apenas verifica uma variável
+global antes de executar o método original. Com enable() cada chamada registra
+o número de chamadas, erros, bytes lidos/gravados, tempo total e um histograma
+de tempos, além dos acertos/falhas do cache de FileJson.
+
+    enable()/disable()  - Ativa/desativa a instrumentação.
+    stats()             - Retorna as estatísticas acumuladas (dicionário).
+    reset()             - Descarta as estatísticas.
+    add_hook(callback)  - callback(event) é chamado ao fim de cada operação.
+
+   event é um dicionário {'op', 'path', 'seconds', 'bytes_read', 'bytes_written', 'error'}.
+
+   A instrumentação também pode ser ativada sem alterar o código, com a variável
+de ambiente APPS_CONF_STATS=1.
+"""
+
+# _thread em vez de threading, este módulo é importado junto com apps_conf.__main__.
+from _thread import allocate_lock, _local as _thread_local
+from functools import wraps
+from os import environ
+import time
+
+
+# Limites (em segundos) das faixas do histograma de tempos, a última faixa é '+inf'.
+HISTOGRAM_BOUNDS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+_enabled: bool = environ.get('APPS_CONF_STATS', '') == '1'
+_lock = allocate_lock()
+_local = _thread_local()
+_hooks: list = []
+# Nome da operação -> _OpStats
+_ops: dict = {}
+# Caminho -> {nome da operação: número de chamadas}
+_paths: dict = {}
+_totals: dict = {'bytes_read': 0, 'bytes_written': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+
+class _OpStats(object):
+    __slots__ = ('calls', 'errors', 'seconds', 'bytes_read', 'bytes_written', 'histogram')
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.errors: int = 0
+        self.seconds: float = 0.0
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+        self.histogram: list = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def to_dict(self) -> dict:
+        labels = [f'<={bound}s' for bound in HISTOGRAM_BOUNDS] + ['+inf']
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'seconds': self.seconds,
+            'mean_seconds': self.seconds / self.calls if self.calls else 0.0,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'histogram': dict(zip(labels, self.histogram)),
+        }
+
+
+class _Frame(object):
+    """Operação em andamento na thread atual (soma os bytes de record_read()/record_write())."""
+    __slots__ = ('bytes_read', 'bytes_written')
+
+    def __init__(self) -> None:
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    with _lock:
+        _ops.clear()
+        _paths.clear()
+        for key in _totals:
+            _totals[key] = 0
+
+
+def stats(*, by_path: bool=False) -> dict:
+    """
+       Retorna as estatísticas acumuladas:
+
+    {
+        'enabled': bool,
+        'operations': {'FileJson.update_key': {'calls', 'errors', 'seconds', ...}, ...},
+        'bytes_read': int, 'bytes_written': int,
+        'cache': {'hits': int, 'misses': int, 'hit_rate': float},
+        'paths': {caminho: {operação: chamadas}}   (apenas com by_path=True)
+    }
+    """
+    with _lock:
+        _lookups = _totals['cache_hits'] + _totals['cache_misses']
+        result = {
+            'enabled': _enabled,
+            'operations': {name: op.to_dict() for name, op in sorted(_ops.items())},
+            'bytes_read': _totals['bytes_read'],
+            'bytes_written': _totals['bytes_written'],
+            'cache': {
+                'hits': _totals['cache_hits'],
+                'misses': _totals['cache_misses'],
+                'hit_rate': _totals['cache_hits'] / _lookups if _lookups else 0.0,
+            },
+        }
+        if by_path:
+            result['paths'] = {path: dict(ops) for path, ops in _paths.items()}
+    return result
+
+
+def add_hook(callback) -> None:
+    """Registra callback(event), chamado (na thread da operação) ao fim de cada operação instrumentada."""
+    with _lock:
+        if not callback in _hooks:
+            _hooks.append(callback)
+
+
+def remove_hook(callback) -> None:
+    with _lock:
+        if callback in _hooks:
+            _hooks.remove(callback)
+
+
+def record_read(nbytes: int) -> None:
+    """
+       Soma nbytes lidos às operações em andamento na thread atual (uma operação
+    inclui os bytes das operações chamadas por ela) e ao total (use apenas se is_enabled()).
+    """
+    for frame in getattr(_local, 'frames', ()):
+        frame.bytes_read += nbytes
+    with _lock:
+        _totals['bytes_read'] += nbytes
+
+
+def record_write(nbytes: int) -> None:
+    """Igual a record_read(), para bytes gravados."""
+    for frame in getattr(_local, 'frames', ()):
+        frame.bytes_written += nbytes
+    with _lock:
+        _totals['bytes_written'] += nbytes
+
+
+def record_cache(hit: bool) -> None:
+    """Registra um acerto/falha do cache (use apenas se is_enabled())."""
+    with _lock:
+        _totals['cache_hits' if hit else 'cache_misses'] += 1
+
+
+def instrumented(name: str, *, path_attr: str=None):
+    """
+       Decorador dos métodos públicos de E/S. name é o nome da operação em stats(),
+    path_attr é o atributo (FilePath) de self com o caminho do arquivo.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not _enabled:
+                return func(self, *args, **kwargs)
+            return _call(name, func, self, args, kwargs, path_attr)
+        return wrapper
+    return decorator
+
+
+def instrumented_generator(name: str, *, path_attr: str=None):
+    """
+       Igual a instrumented(), para métodos geradores (iter_lines()). O tempo
+    registrado é a soma do tempo gasto dentro do gerador, até o fim ou close().
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not _enabled:
+                return func(self, *args, **kwargs)
+            return _call_generator(name, func, self, args, kwargs, path_attr)
+        return wrapper
+    return decorator
+
+
+def _frames() -> list:
+    frames = getattr(_local, 'frames', None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def _get_path(self, path_attr: str) -> str:
+    if path_attr is None:
+        return None
+    try:
+        return getattr(self, path_attr).path()
+    except Exception:
+        return None
+
+
+def _call(name: str, func, self, args: tuple, kwargs: dict, path_attr: str):
+    frames = _frames()
+    frame = _Frame()
+    frames.append(frame)
+    error = None
+    start = time.perf_counter()
+    try:
+        return func(self, *args, **kwargs)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        frames.pop()
+        _finish(name, _get_path(self, path_attr), seconds, frame, error)
+
+
+def _call_generator(name: str, func, self, args: tuple, kwargs: dict, path_attr: str):
+    frames = _frames()
+    frame = _Frame()
+    error = None
+    seconds = 0.0
+    gen = func(self, *args, **kwargs)
+    try:
+        while True:
+            # A operação fica no topo da pilha apenas enquanto o gerador executa.
+            frames.append(frame)
+            start = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                seconds += time.perf_counter() - start
+                frames.pop()
+            yield item
+    finally:
+        frames.append(frame)
+        start = time.perf_counter()
+        try:
+            gen.close()
+        finally:
+            seconds += time.perf_counter() - start
+            frames.pop()
+            _finish(name, _get_path(self, path_attr), seconds, frame, error)
+
+
+def _finish(name: str, path: str, seconds: float, frame: _Frame, error: BaseException) -> None:
+    with _lock:
+        op = _ops.get(name)
+        if op is None:
+            op = _ops[name] = _OpStats()
+        op.calls += 1
+        op.seconds += seconds
+        op.bytes_read += frame.bytes_read
+        op.bytes_written += frame.bytes_written
+        if error is not None:
+            op.errors += 1
+        for n, bound in enumerate(HISTOGRAM_BOUNDS):
+            if seconds <= bound:
+                op.histogram[n] += 1
+                break
+        else:
+            op.histogram[-1] += 1
+        if path is not None:
+            _path_ops = _paths.setdefault(path, {})
+            _path_ops[name] = _path_ops.get(name, 0) + 1
+        hooks = list(_hooks)
+
+    if hooks != []:
+        event = {
+            'op': name,
+            'path': path,
+            'seconds': seconds,
+            'bytes_read': frame.bytes_read,
+            'bytes_written': frame.bytes_written,
+            'error': error,
+        }
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                print(__name__, e)
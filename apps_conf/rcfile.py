@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Edição de arquivos de inicialização do shell (~/.bashrc, ~/.profile, ~/.zshrc).
+
+   As alterações são agrupadas em um RcEditor e aplicadas com apply(), cada
+arquivo é lido uma única vez (linha a linha) e só é alterado se necessário. As
+linhas ficam dentro de um bloco com marcadores, identificado por block:
+
+    # >>> apps_conf >>>
+    export PATH="/home/user/.local/bin":"$PATH"
+    # <<< apps_conf <<<
+
+    editor = RcEditor(block='meu_app')
+    editor.add_path('~/.local/bin')
+    editor.set_env('EDITOR', 'vim')
+    editor.add_source('~/.config/meu_app/env.sh')
+    editor.apply()   # {'/home/user/.bashrc': 'appended', ...}
+
+   As alterações são idempotentes: aplicar o mesmo editor novamente não altera
+os arquivos. Linhas novas são adicionadas no fim do arquivo (em um novo trecho
+do mesmo bloco), o arquivo só é regravado (de forma atômica, veja
+write_file_atomic()) quando uma linha do bloco muda (ex: uma variável com
+outro valor), e os trechos do bloco são reunidos em um só. Antes da primeira
+alteração de cada arquivo uma cópia <arquivo>.bak é criada.
+"""
+
+import os
+
+from .__main__ import write_file_atomic
+
+
+# Arquivos usados quando RcEditor() não recebe files.
+DEFAULT_RC_FILES = ('.bashrc', '.profile', '.zshrc')
+
+# Resultado de apply() para cada arquivo.
+UNCHANGED = 'unchanged'
+APPENDED = 'appended'
+REWRITTEN = 'rewritten'
+CREATED = 'created'
+
+
+def _double_quote(text: str) -> str:
+    """Texto entre aspas duplas para o shell ($PATH continua sendo expandido fora de text)."""
+    for char in ('\\', '"', '$', '`'):
+        text = text.replace(char, '\\' + char)
+    return f'"{text}"'
+
+
+def _single_quote(text: str) -> str:
+    """Texto literal entre aspas simples para o shell."""
+    return "'" + text.replace("'", "'\"'\"'") + "'"
+
+
+def _path_entries(line: bytes) -> set:
+    """Diretórios de uma linha export PATH=... (separados por ':', sem aspas e sem '/' no fim)."""
+    value = line[len(b'export PATH='):].strip()
+    entries = set()
+    for entry in value.split(b':'):
+        entry = entry.strip(b'"\'')
+        entries.add(entry.rstrip(b'/') or entry)
+    return entries
+
+
+def default_rc_files(home: str=None) -> list:
+    """
+       Retorna os arquivos de DEFAULT_RC_FILES que existem em home (padrão ~),
+    ou [~/.bashrc] se nenhum deles existir.
+    """
+    if home is None:
+        home = os.path.expanduser('~')
+    files = [os.path.join(home, name) for name in DEFAULT_RC_FILES]
+    existing = [f for f in files if os.path.isfile(f)]
+    return existing if existing != [] else files[:1]
+
+
+class RcEditor(object):
+    """
+       Conjunto de alterações (PATH, variáveis e arquivos carregados com '.')
+    aplicadas em um ou mais arquivos rc com apply().
+
+    files = Arquivos a alterar (padrão default_rc_files()).
+    block = Nome do bloco com marcadores, use um nome por aplicativo.
+    backup = Criar <arquivo>.bak antes da primeira alteração.
+    """
+    def __init__(self, files: list=None, *, block: str='apps_conf', backup: bool=True) -> None:
+        super().__init__()
+        self.files: list = [os.path.abspath(os.path.expanduser(f)) for f in files] if files else None
+        self.block: str = block
+        self.backup: bool = backup
+        # chave -> linha, chave = ('path', dir), ('env', nome) ou ('source', arquivo)
+        self._edits: dict = {}
+
+    @property
+    def begin_marker(self) -> str:
+        return f'# >>> {self.block} >>>'
+
+    @property
+    def end_marker(self) -> str:
+        return f'# <<< {self.block} <<<'
+
+    def add_path(self, directory: str, *, append: bool=False) -> 'RcEditor':
+        """Adiciona directory no início (ou no fim, com append=True) de $PATH."""
+        directory = os.path.abspath(os.path.expanduser(directory))
+        if append:
+            line = f'export PATH="$PATH":{_double_quote(directory)}'
+        else:
+            line = f'export PATH={_double_quote(directory)}:"$PATH"'
+        self._edits[('path', directory)] = line
+        return self
+
+    def set_env(self, name: str, value: str) -> 'RcEditor':
+        """Define a variável de ambiente name (value é usado literalmente, sem expansão)."""
+        if not name.replace('_', 'a').isalnum() or name[0].isdigit():
+            raise ValueError(f'{__class__.__name__} nome de variável inválido: {name}')
+        self._edits[('env', name)] = f'export {name}={_single_quote(str(value))}'
+        return self
+
+    def add_source(self, path: str) -> 'RcEditor':
+        """Carrega path com '.' (se o arquivo existir)."""
+        path = os.path.abspath(os.path.expanduser(path))
+        self._edits[('source', path)] = f'[ -f {_double_quote(path)} ] && . {_double_quote(path)}'
+        return self
+
+    def apply(self) -> dict:
+        """
+           Aplica as alterações em cada arquivo, retorna {arquivo: resultado}, onde
+        resultado é 'unchanged', 'appended', 'rewritten' ou 'created'.
+        Exceções de leitura/gravação são repassadas para quem chamou.
+        """
+        files = self.files if self.files is not None else default_rc_files()
+        return {path: self._apply_file(path) for path in files}
+
+    def _key_of(self, line: str, lines: dict) -> tuple:
+        """Chave (veja _edits) de uma linha do bloco, ou None. lines = {linha: chave}."""
+        key = lines.get(line)
+        if key is not None:
+            return key
+        if line.startswith('export PATH='):
+            for key in self._edits:
+                if (key[0] == 'path') and (_double_quote(key[1]) in line):
+                    return key
+        elif line.startswith('export ') and ('=' in line):
+            return ('env', line[len('export '):line.index('=')])
+        return None
+
+    def _scan(self, path: str, *, keep_outside: bool=False) -> tuple:
+        """
+           Lê path uma única vez (em bytes, sem decodificar as linhas fora do bloco).
+        Retorna (linhas fora do bloco, posição do bloco em outside, linhas do bloco,
+        chaves já configuradas, arquivo termina com '\n'), ou None se o arquivo não existir.
+        outside só é preenchido com keep_outside=True (para regravar o arquivo).
+        """
+        outside, block, configured = [], [], set()
+        block_at = None
+        last = b'\n'
+        lines = {line: key for key, line in self._edits.items()}
+        _paths = [(key, os.fsencode(key[1])) for key in self._edits if key[0] == 'path']
+        begin_marker, end_marker = self.begin_marker.encode('utf-8'), self.end_marker.encode('utf-8')
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+        inside = False
+        with file:
+            for line in file:
+                last = line
+                if inside:
+                    text = line.rstrip(b'\r\n')
+                    if text == end_marker:
+                        inside = False
+                        continue
+                    text = text.decode('utf-8', 'surrogateescape')
+                    block.append(text)
+                    if text in lines:
+                        configured.add(lines[text])
+                elif line.startswith(b'# >>> ') and (line.rstrip(b'\r\n') == begin_marker):
+                    inside = True
+                    if block_at is None:
+                        block_at = len(outside)
+                else:
+                    if keep_outside:
+                        outside.append(line)
+                    # Configurações anteriores ao bloco (ex: add_home_in_path() de versões antigas).
+                    if line.startswith(b'export PATH='):
+                        entries = _path_entries(line)
+                        for key, directory in _paths:
+                            if directory in entries:
+                                configured.add(key)
+        return outside, block_at, block, configured, last.endswith(b'\n')
+
+    def _apply_file(self, path: str) -> str:
+        result = self._scan(path)
+        if result is None:
+            content = '\n'.join([self.begin_marker] + list(self._edits.values()) + [self.end_marker]) + '\n'
+            write_file_atomic(path, content.encode('utf-8', 'surrogateescape'))
+            return CREATED
+
+        _, _, block, configured, ends_with_newline = result
+        missing = [key for key in self._edits if not key in configured]
+        if missing == []:
+            return UNCHANGED
+
+        # Linhas do bloco com a mesma chave e outro valor precisam ser substituídas.
+        lines = {line: key for key, line in self._edits.items()}
+        replace = {self._key_of(line, lines) for line in block} & set(missing)
+
+        if self.backup:
+            self._make_backup(path)
+
+        if not replace:
+            # Apenas adições: um novo trecho do bloco no fim do arquivo.
+            _new = [self.begin_marker] + [self._edits[k] for k in missing] + [self.end_marker]
+            data = ('' if ends_with_newline else '\n') + '\n'.join(_new) + '\n'
+            with open(path, 'ab') as file:
+                file.write(data.encode('utf-8', 'surrogateescape'))
+            return APPENDED
+
+        # Regravar o arquivo com um único bloco, na posição do primeiro trecho. O arquivo
+        # é lido novamente, agora guardando as linhas fora do bloco.
+        outside, block_at, block, configured, _ = self._scan(path, keep_outside=True)
+        missing = [key for key in self._edits if not key in configured]
+        _block = [line for line in block if not self._key_of(line, lines) in replace] + \
+            [self._edits[k] for k in missing]
+        _block = [
+            f'{line}\n'.encode('utf-8', 'surrogateescape') for line in [self.begin_marker] + _block + [self.end_marker]
+        ]
+        if (block_at > 0) and (not outside[block_at - 1].endswith(b'\n')):
+            outside[block_at - 1] += b'\n'
+        write_file_atomic(path, b''.join(outside[:block_at] + _block + outside[block_at:]))
+        return REWRITTEN
+
+    @staticmethod
+    def _make_backup(path: str) -> None:
+        from shutil import copyfile
+
+        backup = path + '.bak'
+        if not os.path.isfile(backup):
+            copyfile(path, backup)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Registro dos aplicativos instalados (os subdiretórios de ConfDirs.dirOptional()).
+
+   Para cada aplicativo o registro guarda o diretório do aplicativo, o script em
+dirBin(), o arquivo .desktop em dirDesktopEntry(), o arquivo de configuração
+(os mesmos caminhos de AppDirs.appdir(), script(), desktop_entry() e fileconf())
+e o espaço ocupado em disco. Os diretórios base são obtidos de um único ConfDirs,
+nenhum AppDirs é criado.
+
+    registry = AppRegistry()
+    registry.apps()              # ['app_1', 'app_2', ...]
+    registry.get('app_1')        # {'appdir': ..., 'script': ..., 'desktop_entry': ..., 'config': ..., 'size': ...}
+    'app_1' in registry
+
+   O registro é gravado em um manifesto json (padrão <dirCache()>/apps_conf/registry.json)
+e atualizado de forma incremental: refresh() consulta o mtime dos diretórios base
+e de cada aplicativo, e lê novamente apenas o que mudou. O tamanho de um aplicativo
+é recalculado quando o mtime do seu diretório muda (arquivos alterados em
+subdiretórios não alteram esse mtime, use refresh(sizes=True)).
+"""
+
+import os
+import threading
+import time
+
+from .__main__ import ConfDirs, JsonSerializer, write_file_atomic
+
+
+MANIFEST_VERSION: int = 1
+# Diretórios alterados há menos de RACY_SECONDS são verificados novamente no
+# próximo refresh() (uma alteração no mesmo instante da leitura não altera o mtime).
+RACY_SECONDS: float = 2.0
+
+_registries: dict = {}
+_registries_lock = threading.Lock()
+
+
+def _mtime(path: str) -> int:
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if time.time_ns() - mtime < RACY_SECONDS * 1e9:
+        return -1
+    return mtime
+
+
+def disk_usage(path: str) -> int:
+    """Retorna o espaço em disco (bytes) usado por path e seu conteúdo, sem seguir links simbólicos."""
+    total = 0
+    pending = [path]
+    while pending != []:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    _stat = entry.stat(follow_symlinks=False)
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                except OSError:
+                    continue
+                blocks = getattr(_stat, 'st_blocks', None)
+                total += blocks * 512 if blocks is not None else _stat.st_size
+    return total
+
+
+def _list_names(path: str, *, dirs: bool=False, suffix: str='') -> set:
+    """Nomes (sem suffix) dos diretórios (dirs=True) ou arquivos de path."""
+    names = set()
+    if path is None:
+        return names
+    try:
+        entries = os.scandir(path)
+    except OSError:
+        return names
+    with entries:
+        for entry in entries:
+            if (suffix != '') and (not entry.name.endswith(suffix)):
+                continue
+            try:
+                if entry.is_dir() != dirs:
+                    continue
+            except OSError:
+                continue
+            names.add(entry.name[:len(entry.name) - len(suffix)])
+    return names
+
+
+class AppRegistry(object):
+    """
+       Registro dos aplicativos instalados.
+
+    apps()             - Nomes dos aplicativos, em ordem.
+    get(app)           - Informações de app (dicionário) ou None.
+    records()          - {app: informações} de todos os aplicativos.
+    total_size()       - Soma do espaço em disco de todos os aplicativos.
+    refresh()          - Atualiza o registro (apenas o que mudou) e grava o manifesto.
+
+    type_root = Aplicativos do sistema (/opt ...) em vez dos do usuário (~/.local/opt ...).
+    manifest = Arquivo do manifesto, None = <dirCache()>/apps_conf/registry.json,
+               False = não gravar o manifesto.
+    max_age = As consultas chamam refresh() se a última verificação tiver mais
+              de max_age segundos, None = apenas com refresh().
+    """
+    def __init__(self, *, type_root: bool=False, manifest: str=None, max_age: float=5.0) -> None:
+        super().__init__()
+        conf = ConfDirs(type_root=type_root)
+        self.type_root: bool = conf.type_root
+        self.dir_optional: str = conf.dirOptional()
+        self.dir_bin: str = conf.dirBin()
+        self.dir_desktop_entry: str = conf.dirDesktopEntry()
+        self.dir_config: str = conf.dirConfig()
+        if manifest is None:
+            manifest = os.path.join(conf.dirCache(), 'apps_conf', 'registry.json')
+        self.manifest: str = os.path.abspath(os.path.expanduser(manifest)) if manifest else None
+        self.max_age: float = max_age
+        self._serializer = JsonSerializer(compact=True)
+        self._lock = threading.RLock()
+        self._loaded: bool = False
+        self._checked: float = None
+        # diretório base -> mtime_ns
+        self._mtimes: dict = {}
+        # app -> [mtime do diretório do app, mtime do diretório de configuração do app]
+        self._app_mtimes: dict = {}
+        self._scripts: set = set()
+        self._desktop_entries: set = set()
+        # app -> informações (veja get())
+        self._apps: dict = {}
+
+    def _base_dirs(self) -> dict:
+        return {
+            'optional': self.dir_optional,
+            'bin': self.dir_bin,
+            'desktop_entry': self.dir_desktop_entry,
+            'config': self.dir_config,
+        }
+
+    def _load(self) -> None:
+        """Carrega o manifesto, se ele existir e for dos mesmos diretórios base."""
+        self._loaded = True
+        if not self.manifest:
+            return
+        try:
+            with open(self.manifest, 'rb') as file:
+                content = self._serializer.loads(file.read())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f'{__class__.__name__} manifesto inválido ... {self.manifest} {e}')
+            return
+        if not isinstance(content, dict):
+            return
+        if (content.get('version') != MANIFEST_VERSION) or (content.get('dirs') != self._base_dirs()):
+            return
+        self._mtimes = content['mtimes']
+        self._app_mtimes = content['app_mtimes']
+        self._scripts = set(content['scripts'])
+        self._desktop_entries = set(content['desktop_entries'])
+        self._apps = content['apps']
+
+    def _save(self) -> None:
+        if not self.manifest:
+            return
+        content = {
+            'version': MANIFEST_VERSION,
+            'dirs': self._base_dirs(),
+            'mtimes': self._mtimes,
+            'app_mtimes': self._app_mtimes,
+            'scripts': sorted(self._scripts),
+            'desktop_entries': sorted(self._desktop_entries),
+            'apps': self._apps,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.manifest), exist_ok=True)
+            write_file_atomic(self.manifest, self._serializer.dumps(content), encoding='utf-8')
+        except OSError as e:
+            print(f'{__class__.__name__} não foi possível gravar o manifesto ... {self.manifest} {e}')
+
+    def _changed(self, path: str) -> bool:
+        mtime = _mtime(path)
+        if (mtime != -1) and (self._mtimes.get(path, -1) == mtime):
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    def refresh(self, *, force: bool=False, sizes: bool=False) -> bool:
+        """
+           Atualiza o registro e grava o manifesto se algo mudou, retorna True se algo mudou.
+
+        force = Lê novamente todos os diretórios.
+        sizes = Recalcula o tamanho de todos os aplicativos.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if force:
+                self._mtimes, self._app_mtimes = {}, {}
+
+            changed = False
+            if self._changed(self.dir_optional):
+                changed = True
+                names = _list_names(self.dir_optional, dirs=True)
+                for app in set(self._apps) - names:
+                    del self._apps[app]
+                    self._app_mtimes.pop(app, None)
+            else:
+                names = set(self._apps)
+
+            links_changed = False
+            if (self.dir_bin is not None) and self._changed(self.dir_bin):
+                links_changed = True
+                self._scripts = _list_names(self.dir_bin)
+            if (self.dir_desktop_entry is not None) and self._changed(self.dir_desktop_entry):
+                links_changed = True
+                self._desktop_entries = _list_names(self.dir_desktop_entry, suffix='.desktop')
+
+            for app in names:
+                appdir = os.path.join(self.dir_optional, app)
+                mtimes = [_mtime(appdir), _mtime(os.path.join(self.dir_config, app))]
+                _old = self._app_mtimes.get(app)
+                record = self._apps.get(app)
+                if (record is not None) and (_old == mtimes) and (not -1 in mtimes) and (not sizes):
+                    if links_changed:
+                        changed |= self._update_links(app, record)
+                    continue
+                changed = True
+                if (record is None) or sizes or (_old is None) or (_old[0] != mtimes[0]) or (mtimes[0] == -1):
+                    size = disk_usage(appdir)
+                else:
+                    size = record['size']
+                config = os.path.join(self.dir_config, app, f'{app}.json')
+                record = self._apps[app] = {
+                    'appdir': appdir,
+                    'script': None,
+                    'desktop_entry': None,
+                    'config': config if os.path.isfile(config) else None,
+                    'size': size,
+                }
+                self._update_links(app, record)
+                self._app_mtimes[app] = mtimes
+
+            changed |= links_changed
+            if changed:
+                self._save()
+            self._checked = time.monotonic()
+        return changed
+
+    def _update_links(self, app: str, record: dict) -> bool:
+        """Atualiza script/desktop_entry de record, retorna True se algo mudou."""
+        script = os.path.join(self.dir_bin, app) if app in self._scripts else None
+        desktop_entry = None
+        if app in self._desktop_entries:
+            desktop_entry = os.path.join(self.dir_desktop_entry, f'{app}.desktop')
+        if (record['script'] == script) and (record['desktop_entry'] == desktop_entry):
+            return False
+        record['script'], record['desktop_entry'] = script, desktop_entry
+        return True
+
+    def _check(self) -> None:
+        if (self._checked is None) or ((self.max_age is not None) and (time.monotonic() - self._checked > self.max_age)):
+            self.refresh()
+
+    def apps(self) -> list:
+        self._check()
+        return sorted(self._apps)
+
+    def get(self, app: str) -> dict:
+        """
+           Retorna {'appdir', 'script', 'desktop_entry', 'config', 'size'} de app,
+        ou None se app não estiver instalado. script, desktop_entry e config são
+        None quando o arquivo não existe, size é o espaço em disco de appdir.
+        """
+        self._check()
+        record = self._apps.get(app)
+        return dict(record) if record is not None else None
+
+    def records(self) -> dict:
+        self._check()
+        return {app: dict(record) for app, record in sorted(self._apps.items())}
+
+    def total_size(self) -> int:
+        self._check()
+        return sum(record['size'] for record in self._apps.values())
+
+    def __contains__(self, app: str) -> bool:
+        self._check()
+        return app in self._apps
+
+    def __len__(self) -> int:
+        self._check()
+        return len(self._apps)
+
+    def __iter__(self):
+        return iter(self.apps())
+
+
+def get_registry(*, type_root: bool=False) -> AppRegistry:
+    """Retorna o AppRegistry compartilhado pelo processo para type_root (usado por AppDirs)."""
+    with _registries_lock:
+        registry = _registries.get(type_root)
+        if registry is None:
+            registry = _registries[type_root] = AppRegistry(type_root=type_root)
+        return registry
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Notificação de alterações em arquivos, usada por FileJson.watch() e
+FileReader.watch().
+
+   Em sistemas Linux os eventos são obtidos com inotify (via ctypes), nos outros
+sistemas (ou se inotify não estiver disponível) os arquivos são verificados
+com os.stat() a cada interval segundos.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+
+# Eventos inotify (linux/inotify.h).
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# O diretório do arquivo é monitorado, e não o arquivo, pois os arquivos são
+# substituídos com os.replace() (o inode do arquivo muda a cada gravação).
+# IN_DELETE_SELF/IN_MOVE_SELF/IN_IGNORED: o próprio diretório foi removido ou movido,
+# os arquivos passam a ser verificados com os.stat() até o diretório voltar a existir.
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ATTRIB | \
+    IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct('iIII')
+
+
+class _Inotify(object):
+    """Acesso mínimo às funções inotify da libc."""
+    def __init__(self) -> None:
+        super().__init__()
+        _name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._libc.inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            _errno = ctypes.get_errno()
+            raise OSError(_errno, os.strerror(_errno))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            _errno = ctypes.get_errno()
+            raise OSError(_errno, os.strerror(_errno), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> list:
+        """Retorna os eventos pendentes [(wd, mask, name), ...]."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _cookie, size = _EVENT.unpack_from(data, pos)
+                pos += _EVENT.size
+                name = os.fsdecode(data[pos:pos + size].rstrip(b'\0'))
+                pos += size
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher(object):
+    """
+       Monitora arquivos e chama callback(path) quando um arquivo é alterado,
+    criado, substituído ou removido.
+
+    watch(path, callback)   - Registra um callback para path.
+    unwatch(path, callback) - Remove o callback (ou todos os callbacks de path).
+    check(timeout)          - Processa os eventos pendentes, retorna os arquivos alterados.
+    start()/stop()          - Executa check() em uma thread.
+
+    use_inotify = Usar inotify quando disponível, se False (ou se inotify não estiver
+                  disponível) os arquivos são verificados com os.stat().
+    interval = Intervalo entre as verificações (polling) e timeout da thread.
+
+    Os callbacks são chamados na thread que executa check().
+    """
+    def __init__(self, *, use_inotify: bool=True, interval: float=1.0) -> None:
+        super().__init__()
+        self.interval: float = interval
+        self._callbacks: dict = {}
+        self._lock = threading.RLock()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+        # Polling: path -> (st_mtime_ns, st_size, st_ino) ou None.
+        self._stats: dict = {}
+        # inotify: diretório -> wd e wd -> diretório.
+        self._wds: dict = {}
+        self._dirs: dict = {}
+        self._inotify: _Inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    @property
+    def backend(self) -> str:
+        """'inotify' ou 'polling'."""
+        return 'polling' if self._inotify is None else 'inotify'
+
+    def watch(self, path: str, callback) -> None:
+        path = os.path.abspath(path)
+        with self._lock:
+            if not path in self._callbacks:
+                self._callbacks[path] = []
+                self._stats[path] = self._stat(path)
+                if self._inotify is not None:
+                    self._watch_dir(os.path.dirname(path))
+            self._callbacks[path].append(callback)
+
+    def unwatch(self, path: str, callback=None) -> None:
+        path = os.path.abspath(path)
+        with self._lock:
+            if not path in self._callbacks:
+                return
+            if callback is not None:
+                self._callbacks[path] = [c for c in self._callbacks[path] if c != callback]
+            if (callback is None) or (self._callbacks[path] == []):
+                del self._callbacks[path]
+                del self._stats[path]
+                _dir = os.path.dirname(path)
+                if (self._inotify is not None) and (not any(os.path.dirname(p) == _dir for p in self._callbacks)):
+                    wd = self._wds.pop(_dir, None)
+                    if wd is not None:
+                        self._dirs.pop(wd, None)
+                        self._inotify.rm_watch(wd)
+
+    def check(self, timeout: float=0) -> list:
+        """
+           Espera até timeout segundos por alterações, chama os callbacks dos
+        arquivos alterados e retorna a lista desses arquivos.
+        """
+        if self._inotify is not None:
+            changed = self._check_inotify(timeout)
+        else:
+            if timeout > 0:
+                self._stop.wait(timeout)
+            changed = self._check_polling()
+
+        for path in changed:
+            with self._lock:
+                callbacks = list(self._callbacks.get(path, []))
+            for callback in callbacks:
+                try:
+                    callback(path)
+                except Exception as e:
+                    print(__class__.__name__, e)
+        return changed
+
+    def start(self) -> None:
+        """Inicia uma thread (daemon) que processa os eventos."""
+        with self._lock:
+            if (self._thread is not None) and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=__class__.__name__, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if (self._thread is not None) and (self._thread is not threading.current_thread()):
+            self._thread.join()
+        self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check(self.interval)
+
+    @staticmethod
+    def _stat(path: str) -> tuple:
+        try:
+            _stat = os.stat(path)
+        except OSError:
+            return None
+        return (_stat.st_mtime_ns, _stat.st_size, _stat.st_ino)
+
+    def _watch_dir(self, _dir: str, *, quiet: bool=False) -> bool:
+        if _dir in self._wds:
+            return True
+        try:
+            wd = self._inotify.add_watch(_dir, _WATCH_MASK)
+        except OSError as e:
+            # Diretório inexistente ou sem permissão, o arquivo é verificado com os.stat().
+            if not quiet:
+                print(__class__.__name__, e)
+            return False
+        self._wds[_dir] = wd
+        self._dirs[wd] = _dir
+        return True
+
+    def _drop_watch(self, wd: int, *, remove: bool=False) -> None:
+        """Esquece wd (o diretório foi removido/movido), os arquivos passam a ser verificados com os.stat()."""
+        _dir = self._dirs.pop(wd, None)
+        if (_dir is not None) and (self._wds.get(_dir) == wd):
+            del self._wds[_dir]
+        if remove:
+            self._inotify.rm_watch(wd)
+
+    def _check_inotify(self, timeout: float) -> list:
+        ready, _, _ = select.select([self._inotify.fd], [], [], timeout)
+        changed = []
+        if ready != []:
+            with self._lock:
+                for wd, mask, name in self._inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        # Eventos perdidos, todos os arquivos são considerados alterados.
+                        changed = list(self._callbacks)
+                        for path in changed:
+                            self._stats[path] = self._stat(path)
+                        continue
+                    if mask & IN_IGNORED:
+                        self._drop_watch(wd)
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        # Depois de movido o wd continua válido, mas não para o mesmo caminho.
+                        self._drop_watch(wd, remove=bool(mask & IN_MOVE_SELF))
+                        continue
+                    _dir = self._dirs.get(wd)
+                    if (_dir is None) or (name == ''):
+                        continue
+                    path = os.path.join(_dir, name)
+                    if (path in self._callbacks) and (not path in changed):
+                        changed.append(path)
+                        self._stats[path] = self._stat(path)
+
+        # Arquivos em diretórios que não puderam ser monitorados (ou que foram
+        # removidos). O diretório é monitorado novamente assim que voltar a existir,
+        # os arquivos ainda são verificados com os.stat() desta vez, pois podem ter
+        # sido alterados antes do novo monitoramento.
+        with self._lock:
+            _unwatched = [p for p in self._callbacks if not os.path.dirname(p) in self._wds]
+            for _dir in {os.path.dirname(p) for p in _unwatched}:
+                self._watch_dir(_dir, quiet=True)
+        for path in self._check_polling(_unwatched):
+            if not path in changed:
+                changed.append(path)
+        return changed
+
+    def _check_polling(self, paths: list=None) -> list:
+        changed = []
+        with self._lock:
+            for path in (list(self._callbacks) if paths is None else paths):
+                _stat = self._stat(path)
+                if _stat != self._stats.get(path):
+                    self._stats[path] = _stat
+                    changed.append(path)
+        return changed
+
+
+_default_watcher: FileWatcher = None
+_default_lock = threading.Lock()
+
+
+def get_default_watcher() -> FileWatcher:
+    """Retorna o FileWatcher compartilhado (já iniciado) usado por FileJson.watch()/FileReader.watch()."""
+    global _default_watcher
+    with _default_lock:
+        if _default_watcher is None:
+            _default_watcher = FileWatcher()
+            _default_watcher.start()
+        return _default_watcher
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Diretórios e arquivos temporários de trabalho (usados por ConfDirs.tempDir(),
+ConfDirs.tempFile() e AppDirs.scratch_dir()).
+
+   Cada TempWorkspace cria um diretório base (permissão 0700) em /dev/shm quando
+houver espaço livre suficiente (memória, sem acesso ao disco), ou no diretório
+temporário padrão do sistema. Diretórios de rascunho (scratch_dir()) são
+esvaziados e reaproveitados entre as chamadas, em vez de criados e removidos
+a cada uso, e são criados no diretório temporário do sistema quando /dev/shm
+não tiver mais min_free bytes livres. O diretório base é removido com cleanup(),
+no fim de um bloco with ou no fim do processo (atexit).
+
+   get_default_workspace() (/dev/shm) é usado apenas pelos diretórios de rascunho,
+get_disk_workspace() (sempre no diretório temporário do sistema) é usado por
+ConfDirs.tempDir()/tempFile(), que podem receber arquivos grandes.
+
+    with get_default_workspace().scratch_dir() as tmp:
+        ...   # tmp é esvaziado e volta para o pool no fim do bloco
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+
+# Diretório em memória (tmpfs) usado quando disponível.
+RAM_DIR = '/dev/shm'
+# Espaço livre mínimo em RAM_DIR para usá-lo.
+DEFAULT_MIN_FREE: int = 64 * 1024 * 1024
+
+# Workspaces ativos, removidos por _cleanup_all() no fim do processo.
+_workspaces = weakref.WeakSet()
+_atexit_registered: bool = False
+_default_workspace = None
+_disk_workspace = None
+_default_lock = threading.Lock()
+
+
+def default_temp_root(*, prefer_ram: bool=True, min_free: int=DEFAULT_MIN_FREE) -> str:
+    """Retorna RAM_DIR se ele existir, for gravável e tiver min_free bytes livres, ou tempfile.gettempdir()."""
+    if prefer_ram and os.path.isdir(RAM_DIR) and os.access(RAM_DIR, os.W_OK | os.X_OK):
+        try:
+            _stat = os.statvfs(RAM_DIR)
+        except OSError:
+            pass
+        else:
+            if _stat.f_bavail * _stat.f_frsize >= min_free:
+                return RAM_DIR
+    return tempfile.gettempdir()
+
+
+def _cleanup_all() -> None:
+    for workspace in list(_workspaces):
+        workspace.cleanup()
+
+
+def _clear_dir(path: str) -> None:
+    """Remove o conteúdo de path (mas não path)."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+
+class TempWorkspace(object):
+    """
+       Diretório base para arquivos temporários de um processo.
+
+    make_dir()    - Cria um diretório que existe até cleanup().
+    make_file()   - Cria um arquivo vazio que existe até cleanup().
+    scratch_dir() - Context manager com um diretório vazio, reaproveitado (pool).
+    cleanup()     - Remove o diretório base e tudo o que foi criado nele.
+
+    root = Onde criar o diretório base (padrão default_temp_root()).
+    prefer_ram/min_free = Veja default_temp_root().
+    pool_size = Número máximo de diretórios de rascunho mantidos para reuso.
+    """
+    def __init__(
+                self, prefix: str='apps_conf-', *, root: str=None, prefer_ram: bool=True,
+                min_free: int=DEFAULT_MIN_FREE, pool_size: int=4
+            ) -> None:
+        super().__init__()
+        self.prefix: str = prefix
+        self.root: str = root if root is not None else default_temp_root(prefer_ram=prefer_ram, min_free=min_free)
+        self.min_free: int = min_free
+        # O espaço livre em RAM_DIR é verificado novamente a cada diretório de rascunho.
+        self._check_free: bool = (root is None) and (self.root == RAM_DIR)
+        self.pool_size: int = pool_size
+        self._path: str = None
+        self._pid: int = None
+        self._pool: list = []
+        self._lock = threading.Lock()
+
+    def path(self) -> str:
+        """Retorna o diretório base, criado no primeiro uso."""
+        with self._lock:
+            return self._base()
+
+    def _base(self) -> str:
+        global _atexit_registered
+        if (self._path is None) or (self._pid != os.getpid()) or (not os.path.isdir(self._path)):
+            # Depois de um fork() o processo filho usa o seu próprio diretório base.
+            self._path = tempfile.mkdtemp(prefix=self.prefix, dir=self.root)
+            self._pid = os.getpid()
+            self._pool = []
+            _workspaces.add(self)
+            if not _atexit_registered:
+                atexit.register(_cleanup_all)
+                _atexit_registered = True
+        return self._path
+
+    def make_dir(self, prefix: str='dir-', *, create: bool=True) -> str:
+        """
+           Cria um diretório no diretório base. create=False retorna apenas um
+        nome único (o diretório não existe).
+        """
+        with self._lock:
+            path = tempfile.mkdtemp(prefix=prefix, dir=self._base())
+        if not create:
+            os.rmdir(path)
+        return path
+
+    def make_file(self, suffix: str='', *, prefix: str='file-', create: bool=True) -> str:
+        """
+           Cria um arquivo vazio no diretório base. create=False retorna apenas
+        um nome único (o arquivo não existe).
+        """
+        with self._lock:
+            fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=self._base())
+        os.close(fd)
+        if not create:
+            os.unlink(path)
+        return path
+
+    def _ram_full(self) -> bool:
+        try:
+            _stat = os.statvfs(RAM_DIR)
+        except OSError:
+            return True
+        return _stat.f_bavail * _stat.f_frsize < self.min_free
+
+    def acquire_dir(self) -> str:
+        """Retorna um diretório de rascunho vazio (do pool, se houver), devolva com release_dir()."""
+        with self._lock:
+            base = self._base()
+            if self._pool != []:
+                return self._pool.pop()
+        if self._check_free and self._ram_full():
+            # Fora do diretório base, release_dir() o remove em vez de devolvê-lo ao pool.
+            return tempfile.mkdtemp(prefix=f'{self.prefix}scratch-', dir=tempfile.gettempdir())
+        return tempfile.mkdtemp(prefix='scratch-', dir=base)
+
+    def release_dir(self, path: str) -> None:
+        """Esvazia path e o devolve ao pool, ou o remove se o pool estiver cheio."""
+        with self._lock:
+            reuse = (len(self._pool) < self.pool_size) and (self._pid == os.getpid())
+        if reuse:
+            try:
+                _clear_dir(path)
+            except OSError:
+                reuse = False
+        if not reuse:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        with self._lock:
+            if os.path.dirname(path) == self._path:
+                self._pool.append(path)
+
+    def scratch_dir(self):
+        """Context manager: with workspace.scratch_dir() as tmp: ..."""
+        return _ScratchDir(self)
+
+    def cleanup(self) -> None:
+        with self._lock:
+            path, self._path, self._pool = self._path, None, []
+            pid = self._pid
+        _workspaces.discard(self)
+        if (path is not None) and (pid == os.getpid()):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cleanup()
+
+
+class _ScratchDir(object):
+    __slots__ = ('workspace', 'path')
+
+    def __init__(self, workspace: TempWorkspace) -> None:
+        self.workspace: TempWorkspace = workspace
+        self.path: str = None
+
+    def __enter__(self) -> str:
+        self.path = self.workspace.acquire_dir()
+        return self.path
+
+    def __exit__(self, *args) -> None:
+        self.workspace.release_dir(self.path)
+        self.path = None
+
+
+def get_default_workspace() -> TempWorkspace:
+    """Retorna o TempWorkspace compartilhado pelo processo, em /dev/shm se houver espaço (usado por AppDirs.scratch_dir())."""
+    global _default_workspace
+    with _default_lock:
+        if _default_workspace is None:
+            _default_workspace = TempWorkspace()
+        return _default_workspace
+
+
+def get_disk_workspace() -> TempWorkspace:
+    """Retorna o TempWorkspace do processo no diretório temporário do sistema (usado por ConfDirs.tempDir()/tempFile())."""
+    global _disk_workspace
+    with _default_lock:
+        if _disk_workspace is None:
+            _disk_workspace = TempWorkspace(prefer_ram=False)
+        return _disk_workspace
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Funções auxiliares compartilhadas pelos benchmarks do apps_conf.
+
+Os benchmarks são scripts independentes, execute a partir da raiz do projeto:
+   python benchmarks/bench_find_text.py
+"""
+
+import json
+import os
+import sys
+import time
+
+dir_of_project = os.path.dirname(os.path.dirname(os.path.abspath(os.path.realpath(__file__))))
+sys.path.insert(0, dir_of_project)
+
+
+def best_of(func, *, repeat: int=5, number: int=1) -> float:
+    """Retorna o menor tempo (em segundos) de uma chamada a func."""
+    _best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        if (_best is None) or (elapsed < _best):
+            _best = elapsed
+    return _best
+
+
+def human_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.0f}{unit}'
+        size /= 1024
+    return f'{size:.0f}TB'
+
+
+def make_text_file(path: str, size: int, *, needle: str=None, position: float=1.0) -> str:
+    """
+       Cria um arquivo de texto sintético (parecido com um .bashrc/log) com
+    aproximadamente size bytes. Se needle for informado, uma linha contendo
+    needle é inserida na posição relativa position (0.0 = início, 1.0 = fim).
+    """
+    line_template = 'export VAR_{0}="/usr/local/lib/app_{0}:/opt/app_{0}/bin"  # linha {0}\n'
+    written = 0
+    inserted = needle is None
+    with open(path, 'w') as file:
+        n = 0
+        while written < size:
+            if (not inserted) and (written >= size * position):
+                line = f'# {needle}\n'
+                inserted = True
+            else:
+                line = line_template.format(n)
+                n += 1
+            file.write(line)
+            written += len(line)
+        if not inserted:
+            file.write(f'# {needle}\n')
+    return path
+
+
+def make_json_config(size: int, *, depth: int=3, width: int=8) -> dict:
+    """
+       Cria um dicionário parecido com um arquivo de configuração, com aproximadamente
+    size bytes quando serializado. depth/width controlam o formato de cada entrada.
+    """
+    def _node(level: int, n: int):
+        if level == depth:
+            return {'path': f'/opt/app_{n}/bin', 'enabled': n % 2 == 0, 'version': [1, n % 10, n], 'size': n * 1.5}
+        return {f'key_{i}': _node(level + 1, n * width + i) for i in range(width)}
+
+    entry_size = len(json.dumps(_node(1, 0)))
+    return {f'app_{n}': _node(1, n) for n in range(max(1, size // entry_size))}
+
+
+def parse_size(text: str) -> int:
+    """'64K', '16M', '1G' ou '1024' -> bytes."""
+    text = text.strip().upper().rstrip('B')
+    for n, unit in enumerate(('K', 'M', 'G'), 1):
+        if text.endswith(unit):
+            return int(float(text[:-1]) * 1024 ** n)
+    return int(text)
+
+
+def make_dir_tree(root: str, dirs: int, *, files_per_dir: int=0, depth: int=2) -> list:
+    """
+       Cria dirs diretórios em root, distribuídos em depth níveis (parecido com
+    ~/.config/<app>/<subdir>), com files_per_dir arquivos vazios em cada um.
+    Retorna a lista dos diretórios criados.
+    """
+    created = []
+    for n in range(dirs):
+        parts = [f'dir_{(n // (10 ** level)) % 10 if level else n}' for level in range(depth)]
+        path = os.path.join(root, *reversed(parts))
+        os.makedirs(path, exist_ok=True)
+        for i in range(files_per_dir):
+            open(os.path.join(path, f'file_{i}'), 'w').close()
+        created.append(path)
+    return created
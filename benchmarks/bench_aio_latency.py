@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Latência do loop de eventos asyncio durante leituras/gravações de FileJson:
+API bloqueante (FileJson chamado dentro das corrotinas) comparada com
+AsyncFileJson (executor com threads).
+
+   python benchmarks/bench_aio_latency.py [--size 1M] [--tasks 8] [--seconds 3]
+
+   Uma corrotina de monitoramento dorme 1ms em loop e registra o atraso de cada
+despertar, quanto menor o atraso, menos o loop foi bloqueado.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from _common import human_size, make_json_config, parse_size
+from apps_conf import AsyncFileJson, FileJson, FilePath
+
+
+INTERVAL = 0.001
+
+
+async def monitor(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(INTERVAL)
+        lags.append(time.perf_counter() - start - INTERVAL)
+
+
+async def blocking_worker(file_json: FileJson, n: int, stop: asyncio.Event, done: list) -> None:
+    while not stop.is_set():
+        file_json.update_key(f'task_{n}', done[0])
+        file_json.lines_to_dict()
+        done[0] += 1
+        # Sem await o loop não executaria nenhuma outra tarefa.
+        await asyncio.sleep(0)
+
+
+async def async_worker(file_json: AsyncFileJson, n: int, stop: asyncio.Event, done: list) -> None:
+    while not stop.is_set():
+        await file_json.update_key(f'task_{n}', done[0])
+        await file_json.lines_to_dict()
+        done[0] += 1
+
+
+async def run(mode: str, path: FilePath, tasks: int, seconds: float) -> tuple:
+    stop = asyncio.Event()
+    lags, done = [], [0]
+    if mode == 'blocking':
+        _file = FileJson(path)
+        workers = [blocking_worker(_file, n, stop, done) for n in range(tasks)]
+    else:
+        _file = AsyncFileJson(path)
+        workers = [async_worker(_file, n, stop, done) for n in range(tasks)]
+
+    start = time.perf_counter()
+    _tasks = [asyncio.ensure_future(w) for w in [monitor(stop, lags)] + workers]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*_tasks)
+    # Com a API bloqueante o teste dura mais que seconds (o loop não acorda a tempo).
+    return lags, done[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default='1M', help='Tamanho do arquivo json (padrão 1M).')
+    parser.add_argument('--tasks', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = FilePath(os.path.join(tmp, 'config.json'))
+        FileJson(path).write_lines(make_json_config(size))
+        print(f'json {human_size(size)}, {args.tasks} tarefas, {args.seconds:.0f}s')
+        for mode in ('blocking', 'async'):
+            lags, ops, elapsed = asyncio.run(run(mode, path, args.tasks, args.seconds))
+            lags.sort()
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+            print(
+                f'{mode:<9} atraso do loop: p50 {statistics.median(lags) * 1000:8.2f}ms  '
+                f'p99 {p99 * 1000:8.2f}ms  máx {lags[-1] * 1000:8.2f}ms  '
+                f'({len(lags)} despertares em {elapsed:.1f}s, {ops / elapsed:7.1f} operações/s)'
+            )
+
+
+if __name__ == '__main__':
+    main()
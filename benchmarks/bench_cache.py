@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Latência de AppCache.put()/get() e custo da remoção LRU com dezenas de
+milhares de entradas.
+
+   python benchmarks/bench_cache.py [--entries 20000] [--size 1K]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from _common import human_size, parse_size
+from apps_conf import AppCache
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f'{name:<34} média {statistics.mean(samples) * 1e6:9.1f}us  '
+        f'p50 {statistics.median(samples) * 1e6:9.1f}us  p99 {p99 * 1e6:9.1f}us'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=20_000)
+    parser.add_argument('--size', default='1K', help='Tamanho de cada entrada (padrão 1K).')
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    data = b'x' * size
+    keys = [f'https://example.com/pacotes/pacote-{n}.tar.gz' for n in range(args.entries)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AppCache(tmp, max_bytes=args.entries * size * 2, max_entries=args.entries)
+        start = time.perf_counter()
+        puts = [timed(lambda: cache.put(key, data)) for key in keys]
+        print(f'{args.entries} entradas de {human_size(size)} gravadas em {time.perf_counter() - start:.2f}s')
+        report('put()', puts)
+
+        sample = random.sample(keys, min(5000, len(keys)))
+        report('get() (acerto)', [timed(lambda: cache.get(key)) for key in sample])
+        report('get_path() (acerto)', [timed(lambda: cache.get_path(key)) for key in sample])
+        report('get() (falha)', [timed(lambda: cache.get(key + '?')) for key in sample[:1000]])
+        report('put() com remoção LRU (cheio)', [timed(lambda: cache.put(key + '#', data)) for key in sample[:1000]])
+
+        cache.close()
+        elapsed = timed(lambda: AppCache(tmp, max_entries=args.entries).close())
+        print(f'{"AppCache() (índice existente)":<34} {elapsed * 1000:9.2f}ms')
+
+        cache = AppCache(tmp, max_bytes=args.entries * size * 2, max_entries=args.entries)
+        cache.max_entries = args.entries // 2
+        elapsed = timed(cache.evict)
+        print(f'{"evict() de " + str(args.entries // 2) + " entradas":<34} {elapsed * 1000:9.2f}ms '
+              f'({elapsed / (args.entries // 2) * 1e6:.1f}us/entrada)')
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
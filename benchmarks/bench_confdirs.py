@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Custo por consulta de ConfDirs/AppDirs com o snapshot dos diretórios,
+comparado com o cálculo dos caminhos a cada chamada (ConfDirsLinux, usado
+por ConfDirs antes do snapshot).
+"""
+
+import argparse
+
+from _common import best_of
+import apps_conf.__main__
+from apps_conf import AppDirs, ConfDirs, KERNEL_TYPE
+from apps_conf.__main__ import ConfDirsLinux
+
+
+N = 20_000
+
+
+def lookups(dirs) -> None:
+    for _ in range(N):
+        dirs.dirBin(), dirs.dirConfig(), dirs.dirCache(), dirs.dirOptional(), dirs.getDirs()
+
+
+def app_lookups(app: AppDirs) -> None:
+    for _ in range(N):
+        app.dircache(), app.dirconfig(), app.script(), app.get_dirs()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--user', action='store_true', help='Medir os diretórios de usuário mesmo executando como root.'
+    )
+    args = parser.parse_args()
+    if KERNEL_TYPE != 'Linux':
+        print('Benchmark disponível apenas em sistemas Linux.')
+        return
+    if args.user:
+        # Os diretórios do root são constantes, o custo maior está nos diretórios do usuário.
+        apps_conf.__main__.geteuid = lambda: 1000
+
+    cases = (
+        ('ConfDirsLinux (sem snapshot)', lambda: lookups(ConfDirsLinux())),
+        ('ConfDirs (snapshot)', lambda: lookups(ConfDirs())),
+        ('AppDirs', lambda: app_lookups(AppDirs(appname='bench'))),
+    )
+    for name, func in cases:
+        print(f'{name:<30} {best_of(func, repeat=3) / N * 1e6:8.2f} us/consulta')
+
+
+if __name__ == '__main__':
+    main()
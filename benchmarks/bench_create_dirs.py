@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Criação dos diretórios de vários aplicativos: AppDirs.create_many() (uma
+passagem, sem repetir os diretórios comuns) comparado com mkdir() para cada
+entrada de cada aplicativo (o create_dirs() anterior).
+
+   python benchmarks/bench_create_dirs.py [--apps N]
+
+Os diretórios são criados em uma HOME temporária (como usuário comum, mesmo
+executando como root).
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import _common  # noqa: F401 (sys.path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--apps', type=int, default=200)
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix='bench-create-dirs-')
+    os.environ['HOME'] = home
+    import apps_conf.__main__
+    from apps_conf import AppDirs, KERNEL_TYPE, mkdir
+
+    if KERNEL_TYPE != 'Linux':
+        print('Benchmark disponível apenas em sistemas Linux.')
+        return
+    apps_conf.__main__.geteuid = lambda: 1000
+
+    def old_create_dirs(app: AppDirs) -> None:
+        for _dirs in (app.config_dirs.getDirs(), app.get_dirs()):
+            for KEY in _dirs:
+                mkdir(_dirs[KEY])
+
+    try:
+        apps = [AppDirs(appname=f'app{n}') for n in range(args.apps)]
+        for name, func in (
+                    ('mkdir() por entrada', lambda: [old_create_dirs(app) for app in apps]),
+                    ('AppDirs.create_many()', lambda: AppDirs.create_many(apps)),
+                ):
+            for state in ('vazio', 'existente'):
+                if state == 'vazio':
+                    shutil.rmtree(home)
+                    os.mkdir(home)
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                print(f'{name:<25} {state:<10} {elapsed * 1000:8.2f}ms ({args.apps} aplicativos)')
+        print(AppDirs.create_many(apps))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Compara FilePath (__slots__ e atributos em cache) com a implementação
+anterior (sem cache), na criação, no acesso aos atributos e na memória
+usada por instância.
+"""
+
+import os
+import tracemalloc
+
+from _common import best_of
+from apps_conf import FilePath
+
+
+class LegacyFilePath(object):
+    """Implementação anterior de FilePath (apenas os métodos medidos)."""
+    def __init__(self, file: str) -> None:
+        super().__init__()
+        self.file = file
+
+    def path(self) -> str:
+        return os.path.abspath(self.file)
+
+    def name(self) -> str:
+        if self.extension() is None:
+            return self.basename()
+        return self.basename().replace(self.extension(), "")
+
+    def dirname(self) -> str:
+        return os.path.dirname(self.path())
+
+    def basename(self) -> str:
+        return os.path.basename(self.path())
+
+    def extension(self) -> str:
+        _ext = os.path.splitext(self.path())[1]
+        if _ext == '':
+            return None
+        return _ext
+
+
+N = 100_000
+PATHS = [f'/opt/apps/app_{n % 500}/share/files/file_{n}.png' for n in range(N)]
+
+
+def memory_per_instance(factory, *, cached: bool=False) -> float:
+    """Memória por instância (sem contar as strings de PATHS), cached=True inclui os atributos em cache."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = factory()
+    if cached:
+        for obj in objs:
+            obj.path(), obj.dirname(), obj.basename(), obj.extension()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return (after - before) / N
+
+
+def access(objs) -> None:
+    for obj in objs:
+        obj.path(), obj.name(), obj.dirname(), obj.basename(), obj.extension()
+
+
+def main():
+    legacy = [LegacyFilePath(p) for p in PATHS]
+    current = [FilePath(p) for p in PATHS]
+    access(current)
+    cases = (
+        ('criação (anterior)', lambda: [LegacyFilePath(p) for p in PATHS]),
+        ('criação FilePath()', lambda: [FilePath(p) for p in PATHS]),
+        ('criação from_paths()', lambda: FilePath.from_paths(PATHS)),
+        ('atributos (anterior)', lambda: access(legacy)),
+        ('atributos (cache)', lambda: access(current)),
+    )
+    for name, func in cases:
+        print(f'{name:<22} {best_of(func, repeat=3) / N * 1e9:8.0f} ns/instância')
+
+    print(f'{"memória (anterior)":<22} {memory_per_instance(lambda: [LegacyFilePath(p) for p in PATHS]):8.0f} bytes/instância')
+    print(f'{"memória (FilePath)":<22} {memory_per_instance(lambda: FilePath.from_paths(PATHS)):8.0f} bytes/instância')
+    print(
+        f'{"memória (com cache)":<22} '
+        f'{memory_per_instance(lambda: FilePath.from_paths(PATHS), cached=True):8.0f} bytes/instância'
+    )
+
+
+if __name__ == '__main__':
+    main()
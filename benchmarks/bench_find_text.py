@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Compara FileReader.find_text() linha a linha com a busca via mmap (use_mmap=True).
+"""
+
+import os
+import tempfile
+
+from _common import best_of, human_size, make_text_file
+from apps_conf import FilePath, FileReader
+
+
+SIZES = (64 * 1024, 4 * 1024 * 1024, 64 * 1024 * 1024)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            path = make_text_file(os.path.join(tmp, f'rc_{size}'), size, needle='APPS_CONF_NEEDLE')
+            reader = FileReader(FilePath(path))
+            for ignore_case in (False, True):
+                lines = best_of(lambda: reader.find_text('apps_conf_needle', ignore_case=ignore_case), repeat=3)
+                mapped = best_of(
+                    lambda: reader.find_text('apps_conf_needle', ignore_case=ignore_case, use_mmap=True), repeat=3
+                )
+                print(
+                    f'{human_size(size):>6} ignore_case={ignore_case!s:<5} '
+                    f'linhas: {lines * 1000:9.2f}ms  mmap: {mapped * 1000:9.2f}ms  '
+                    f'({lines / mapped:5.1f}x)'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Busca do melhor icone de um aplicativo: percorrer os diretórios de resolução
+a cada consulta (os.listdir + os.path.isfile) comparado com IconIndex (leitura
+inicial, refresh() sem alterações e consultas).
+
+   python benchmarks/bench_icons.py [--apps 2000] [--lookups 5000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from _common import best_of
+from apps_conf import IconIndex
+
+RESOLUTIONS = ('16x16', '22x22', '24x24', '32x32', '48x48', '64x64', '128x128', '256x256', '512x512', 'scalable')
+
+
+def make_theme(root: str, apps: int) -> str:
+    theme = os.path.join(root, 'hicolor')
+    rng = random.Random(0)
+    for resolution in RESOLUTIONS:
+        os.makedirs(os.path.join(theme, resolution, 'apps'))
+    for n in range(apps):
+        for resolution in rng.sample(RESOLUTIONS, 4):
+            ext = '.svg' if resolution == 'scalable' else '.png'
+            open(os.path.join(theme, resolution, 'apps', f'app_{n}{ext}'), 'wb').close()
+    return theme
+
+
+def walk_best_icon(theme: str, app: str, min_size: int) -> str:
+    """Busca sem índice: percorre os diretórios de resolução a cada consulta."""
+    found = []
+    for resolution in os.listdir(theme):
+        for ext in ('.png', '.svg'):
+            path = os.path.join(theme, resolution, 'apps', app + ext)
+            if os.path.isfile(path):
+                size = float('inf') if resolution == 'scalable' else int(resolution.split('x')[0])
+                found.append((size, path))
+                break
+    found.sort()
+    for size, path in found:
+        if size >= min_size:
+            return path
+    return found[-1][1] if found else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--apps', type=int, default=2000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        theme = make_theme(root, args.apps)
+        rng = random.Random(1)
+        apps = [f'app_{rng.randrange(args.apps)}' for _ in range(args.lookups)]
+        template = os.path.join(theme, '{size}', 'apps')
+
+        def walk() -> None:
+            for app in apps:
+                walk_best_icon(theme, app, 128)
+
+        def build() -> None:
+            IconIndex([template], [], max_age=None).refresh()
+
+        index = IconIndex([template], [], max_age=None)
+        index.refresh()
+
+        def lookup() -> None:
+            for app in apps:
+                index.best_icon(app, 128)
+
+        for app in apps[:100]:
+            assert index.best_icon(app, 128) == walk_best_icon(theme, app, 128), app
+
+        print(f'{args.apps} aplicativos, {len(RESOLUTIONS)} resoluções, {args.lookups} consultas')
+        elapsed = best_of(walk, repeat=3)
+        print(f'{"percorrer diretórios":<24} {elapsed / args.lookups * 1e6:10.2f} us/consulta')
+        print(f'{"IconIndex leitura":<24} {best_of(build, repeat=3) * 1e3:10.2f} ms')
+        print(f'{"IconIndex refresh()":<24} {best_of(index.refresh) * 1e6:10.2f} us (sem alterações)')
+        elapsed = best_of(lookup)
+        print(f'{"IconIndex.best_icon()":<24} {elapsed / args.lookups * 1e6:10.2f} us/consulta')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Tempo de importação de apps_conf (python -X importtime), usado para
+acompanhar regressões no tempo de inicialização das ferramentas de linha de
+comando que usam apenas AppDirs.
+
+   python benchmarks/bench_import.py [--runs N] [--budget-ms MS]
+
+Retorna o código de saída 1 se a mediana passar de --budget-ms.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from _common import dir_of_project
+
+
+STATEMENT = 'import apps_conf; apps_conf.AppDirs'
+
+# Módulos carregados pelo próprio interpretador antes do código do usuário.
+_STARTUP = ('_frozen_importlib_external', 'zipimport', 'encodings', 'encodings.utf_8', '_signal', 'io', 'site')
+
+
+def import_time_us(statement: str) -> tuple:
+    """
+       Executa statement em um novo interpretador e retorna (tempo total em us,
+    {módulo: tempo acumulado em us}) dos imports feitos por statement.
+    """
+    env = dict(os.environ, PYTHONPATH=dir_of_project)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        env=env, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or ('self [us]' in line):
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        # Apenas os imports do primeiro nível, os outros já estão no tempo acumulado.
+        if name.startswith('  '):
+            continue
+        name = name.strip()
+        if not name in _STARTUP:
+            modules[name] = int(cumulative)
+    return sum(modules.values()), modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    # A primeira execução grava o bytecode (__pycache__).
+    import_time_us(STATEMENT)
+    results = [import_time_us(STATEMENT) for _ in range(args.runs)]
+    median = statistics.median(total for total, _ in results) / 1000
+
+    _, modules = results[-1]
+    for name, cumulative in sorted(modules.items(), key=lambda item: -item[1]):
+        print(f'{name:<30} {cumulative / 1000:7.2f}ms')
+    print(f'{"mediana (" + STATEMENT + ")":<30} {median:7.2f}ms (limite {args.budget_ms:.2f}ms)')
+    if median > args.budget_ms:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Compara a velocidade de leitura/gravação de FileJson com cada backend
+instalado (veja JsonSerializer), nos modos padrão e compact.
+
+   python benchmarks/bench_json_backends.py [--max-size MB]
+"""
+
+import argparse
+import os
+import tempfile
+
+from _common import best_of, human_size, make_json_config
+from apps_conf import FileJson, FilePath, JsonSerializer
+
+
+SIZES = (10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-size', type=float, default=10, help='Maior arquivo em MB (padrão 10).')
+    args = parser.parse_args()
+
+    backends = [b for b in JsonSerializer.BACKENDS if JsonSerializer(b).backend == b]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [s for s in SIZES if s <= args.max_size * 1024 * 1024]:
+            content = make_json_config(size)
+            for backend in backends:
+                for compact in (False, True):
+                    file_json = FileJson(
+                        FilePath(os.path.join(tmp, 'config.json')), cache=False, backend=backend, compact=compact
+                    )
+                    repeat = 5 if size < 10 * 1024 * 1024 else 2
+                    dump = best_of(lambda: file_json.write_lines(content), repeat=repeat)
+                    nbytes = os.path.getsize(file_json.file_path_json.path())
+                    load = best_of(file_json.lines_to_dict, repeat=repeat)
+                    mb = nbytes / 1024 / 1024
+                    print(
+                        f'{human_size(size):>6} {backend:<7} compact={compact!s:<5} '
+                        f'dump: {dump * 1000:9.2f}ms ({mb / dump:7.1f} MB/s)  '
+                        f'load: {load * 1000:9.2f}ms ({mb / load:7.1f} MB/s)'
+                    )
+
+
+if __name__ == '__main__':
+    main()
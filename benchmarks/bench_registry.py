@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Listar os aplicativos instalados e verificar os seus arquivos: um AppDirs por
+aplicativo (os.listdir + os.path.exists em appdir(), script(), desktop_entry() e
+fileconf()) comparado com AppRegistry (leitura inicial, carga do manifesto,
+refresh() sem alterações e consultas). Usa uma HOME temporária.
+
+   python benchmarks/bench_registry.py [--apps 1000]
+"""
+
+import argparse
+import os
+import tempfile
+
+from _common import best_of
+
+
+def make_apps(home: str, apps: int) -> None:
+    opt = os.path.join(home, '.local', 'opt')
+    bin_dir = os.path.join(home, '.local', 'bin')
+    desktop = os.path.join(home, '.local', 'share', 'applications')
+    for path in (opt, bin_dir, desktop):
+        os.makedirs(path)
+    for n in range(apps):
+        os.makedirs(os.path.join(opt, f'app_{n}', 'lib'))
+        with open(os.path.join(opt, f'app_{n}', 'lib', 'data'), 'wb') as file:
+            file.write(b'x' * 4096)
+        if n % 2 == 0:
+            open(os.path.join(bin_dir, f'app_{n}'), 'wb').close()
+        if n % 3 == 0:
+            open(os.path.join(desktop, f'app_{n}.desktop'), 'wb').close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--apps', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = home
+        import apps_conf.__main__
+        # Diretórios do usuário mesmo se executado como root.
+        apps_conf.__main__.geteuid = lambda: 1000
+        from apps_conf import AppDirs, AppRegistry
+        import apps_conf.registry
+
+        make_apps(home, args.apps)
+        apps_conf.registry.RACY_SECONDS = 0
+        manifest = os.path.join(home, 'registry.json')
+
+        def with_appdirs() -> None:
+            opt = AppDirs(appname='_').config_dirs.dirOptional()
+            for name in os.listdir(opt):
+                app = AppDirs(appname=name)
+                [os.path.exists(p) for p in (app.appdir(), app.script(), app.desktop_entry(name), app.fileconf())]
+
+        def build() -> None:
+            if os.path.exists(manifest):
+                os.remove(manifest)
+            AppRegistry(manifest=manifest, max_age=None).refresh()
+
+        def load() -> None:
+            AppRegistry(manifest=manifest, max_age=None).records()
+
+        registry = AppRegistry(manifest=manifest, max_age=None)
+        registry.refresh()
+
+        def lookup() -> None:
+            for name in registry.apps():
+                registry.get(name)
+
+        print(f'{args.apps} aplicativos')
+        print(f'{"AppDirs por aplicativo":<28} {best_of(with_appdirs, repeat=3) * 1e3:10.2f} ms')
+        print(f'{"AppRegistry leitura":<28} {best_of(build, repeat=3) * 1e3:10.2f} ms')
+        print(f'{"AppRegistry manifesto":<28} {best_of(load, repeat=3) * 1e3:10.2f} ms')
+        print(f'{"AppRegistry refresh()":<28} {best_of(registry.refresh) * 1e3:10.2f} ms (sem alterações)')
+        print(f'{"AppRegistry.get() (todos)":<28} {best_of(lookup) * 1e3:10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
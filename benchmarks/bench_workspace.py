@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Diretórios temporários de rascunho: tempfile.TemporaryDirectory() (criado e
+removido a cada uso) comparado com TempWorkspace.scratch_dir() (pool), no
+diretório temporário do sistema e em /dev/shm.
+
+   python benchmarks/bench_workspace.py [--files 10] [--iterations 2000]
+"""
+
+import argparse
+import os
+import tempfile
+
+from _common import best_of
+from apps_conf import TempWorkspace
+
+
+def use_dir(path: str, files: int) -> None:
+    for n in range(files):
+        with open(os.path.join(path, f'file_{n}'), 'wb') as file:
+            file.write(b'x' * 512)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=10, help='Arquivos gravados em cada diretório.')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    def temporary_directory(root: str) -> None:
+        for _ in range(args.iterations):
+            with tempfile.TemporaryDirectory(dir=root) as tmp:
+                use_dir(tmp, args.files)
+
+    def scratch(workspace: TempWorkspace) -> None:
+        for _ in range(args.iterations):
+            with workspace.scratch_dir() as tmp:
+                use_dir(tmp, args.files)
+
+    roots = [tempfile.gettempdir()]
+    if os.path.isdir('/dev/shm'):
+        roots.append('/dev/shm')
+    for root in roots:
+        with TempWorkspace(root=root) as workspace:
+            for name, func in (
+                        ('TemporaryDirectory', lambda: temporary_directory(root)),
+                        ('TempWorkspace.scratch_dir', lambda: scratch(workspace)),
+                    ):
+                elapsed = best_of(func, repeat=3)
+                print(f'{root:<10} {name:<26} {elapsed / args.iterations * 1e6:8.1f} us/uso ({args.files} arquivos)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Verifica FileJson(lazy=True) com arquivos json truncados ou inválidos: is_key()
+e get_value() devem terminar (sem travar) e sem encontrar a chave procurada. O
+tempo de cada consulta é comparado com --limit-ms (as expressões regulares do
+_JsonScanner precisam ser lineares no tamanho do documento).
+
+   python benchmarks/check_json_truncated.py [--items 100000] [--limit-ms 1000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import _common  # Adiciona a raiz do projeto no sys.path.
+from apps_conf import FileJson, FilePath
+
+
+def documents(items: int) -> dict:
+    numbers = ', '.join(['1'] * items)
+    strings = ', '.join(['"a\\"b"'] * items)
+    return {
+        'array truncado': '{"a": [' + numbers,
+        'strings truncadas': '{"a": [' + strings,
+        'string sem fim': '{"a": ["' + 'x' * items,
+        'objetos truncados': '{"a": ' + '{"b": 1, ' * items,
+        'sem colchetes': '{"a": [' + 'x' * items,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--limit-ms', type=float, default=1000.0)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'config.json')
+        for items in (10, 14, 1000, args.items):
+            for name, text in documents(items).items():
+                with open(path, 'w') as file:
+                    file.write(text)
+                file_json = FileJson(FilePath(path), lazy=True, cache=False)
+                start = time.perf_counter()
+                found = (file_json.is_key('z'), file_json.get_value('/a/0/z', 'ausente'))
+                elapsed = (time.perf_counter() - start) * 1e3
+                ok = (found == (False, 'ausente')) and (elapsed <= args.limit_ms)
+                failed |= not ok
+                print(f'{"OK" if ok else "FALHOU":<7} {name:<18} {items:>7} itens {elapsed:9.2f} ms {found}')
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
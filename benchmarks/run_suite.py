@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Suíte de benchmarks de E/S do apps_conf (FileReader, FileJson, ConfDirs,
+AppDirs e add_home_in_path), com dados sintéticos e resultado em JSON para
+comparar versões.
+
+   python benchmarks/run_suite.py [--max-size 16M] [--output results.json] [--compare baseline.json]
+   python benchmarks/run_suite.py --package-dir /caminho/do/checkout/antigo --output baseline.json
+
+   --max-size limita o tamanho dos arquivos rc (de 1K até 1G) e dos arquivos json.
+--package-dir mede o apps_conf de outro diretório (ex: um checkout de uma versão
+anterior), os testes que dependem de recursos que a versão medida não tem usam
+a chamada antiga equivalente ou são ignorados.
+
+   Os testes são executados em uma HOME temporária, os arquivos do usuário não são
+alterados. Executando como root os diretórios são os do sistema, por isso os
+testes de criação de diretórios e de add_home_in_path() são ignorados.
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from _common import best_of, human_size, make_dir_tree, make_json_config, make_text_file, parse_size
+
+
+RC_SIZES = (1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 256 * 1024 * 1024, 1024 * 1024 * 1024)
+JSON_SIZES = (10 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+# (depth, width) dos arquivos json: raso e largo, médio, profundo e estreito.
+JSON_SHAPES = ((1, 64), (3, 8), (6, 3))
+APPS = (10, 200)
+
+
+def accepts(func, name: str) -> bool:
+    """Retorna True se func (ou o __init__ de uma classe) aceita o argumento name."""
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class Suite(object):
+    """Executa os benchmarks e guarda os resultados."""
+    def __init__(self, *, repeat: int, tmp: str) -> None:
+        super().__init__()
+        self.repeat: int = repeat
+        self.tmp: str = tmp
+        self.results: list = []
+
+    def run(self, name: str, func, *, size: int=None, number: int=1, **params) -> None:
+        """Mede func() (melhor de repeat execuções, arquivos grandes são executados menos vezes)."""
+        repeat = self.repeat if (size is None) or (size < 256 * 1024 * 1024) else 1
+        if size is not None:
+            params['size'] = size
+        seconds = best_of(func, repeat=repeat, number=number)
+        self.add(name, seconds, **params)
+
+    def add(self, name: str, seconds: float, **params) -> None:
+        self.results.append({'name': name, 'params': params, 'seconds': seconds})
+        _params = ' '.join(
+            f'{k}={human_size(v) if k == "size" else v}' for k, v in sorted(params.items())
+        )
+        print(f'{name:<28} {_params:<40} {seconds * 1000:12.4f}ms', flush=True)
+
+
+def bench_file_reader(suite: Suite, max_size: int) -> None:
+    from apps_conf import FilePath, FileReader
+
+    for size in [s for s in RC_SIZES if s <= max_size]:
+        path = make_text_file(os.path.join(suite.tmp, f'rc_{size}'), size, needle='APPS_CONF_NEEDLE')
+        if accepts(FileReader, 'persist_index'):
+            reader = FileReader(FilePath(path), persist_index=False)
+        else:
+            reader = FileReader(FilePath(path))
+        suite.run('FileReader.get_lines', reader.get_lines, size=size)
+        suite.run('FileReader.find_text', lambda: reader.find_text('APPS_CONF_NEEDLE'), size=size)
+        if accepts(reader.find_text, 'use_mmap'):
+            suite.run(
+                'FileReader.find_text', lambda: reader.find_text('APPS_CONF_NEEDLE', use_mmap=True),
+                size=size, use_mmap=True
+            )
+        suite.run(
+            'FileReader.append_lines', lambda: reader.append_lines([f'export APPS_CONF_{n}=1' for n in range(10)]),
+            size=size, lines=10
+        )
+        if size <= 256 * 1024 * 1024:
+            # write_lines() precisa do conteúdo inteiro na memória.
+            lines = reader.get_lines()
+            suite.run('FileReader.write_lines', lambda: reader.write_lines(lines), size=size)
+            del lines
+        os.remove(path)
+
+
+def bench_file_json(suite: Suite, max_size: int) -> None:
+    from apps_conf import FileJson, FilePath
+
+    # Versões sem cache= não têm cache (equivalente a cache=False).
+    has_cache = accepts(FileJson, 'cache')
+    has_lazy = accepts(FileJson, 'lazy')
+    for size in [s for s in JSON_SIZES if s <= max_size]:
+        for depth, width in JSON_SHAPES:
+            content = make_json_config(size, depth=depth, width=width)
+            last_key = list(content)[-1]
+            path = FilePath(os.path.join(suite.tmp, f'config_{size}_{depth}.json'))
+            params = {'size': size, 'depth': depth, 'width': width}
+
+            file_json = FileJson(path, cache=False) if has_cache else FileJson(path)
+            suite.run('FileJson.write_lines', lambda: file_json.write_lines(content), **params)
+            suite.run('FileJson.lines_to_dict', file_json.lines_to_dict, **params)
+            suite.run('FileJson.update_key', lambda: file_json.update_key('bench', 1), **params)
+            suite.run('FileJson.is_key', lambda: file_json.is_key(last_key), **params)
+
+            if has_cache:
+                cached = FileJson(path)
+                cached.lines_to_dict()
+                suite.run('FileJson.lines_to_dict', cached.lines_to_dict, cache=True, **params)
+                suite.run('FileJson.is_key', lambda: cached.is_key(last_key), cache=True, **params)
+
+            if has_lazy:
+                lazy = FileJson(path, cache=False, lazy=True) if has_cache else FileJson(path, lazy=True)
+                suite.run('FileJson.is_key', lambda: lazy.is_key(last_key), lazy=True, **params)
+            os.remove(path.path())
+
+
+def bench_dirs(suite: Suite) -> None:
+    from apps_conf import AppDirs, ConfDirs
+
+    number = 1000
+    conf_dirs = ConfDirs()
+    conf_dirs.getDirs()
+    suite.add('ConfDirs.getDirs', best_of(conf_dirs.getDirs, repeat=suite.repeat, number=number))
+    suite.add('ConfDirs.getDirs', best_of(lambda: ConfDirs().getDirs(), repeat=suite.repeat), new_instance=True)
+
+    if os.geteuid() == 0:
+        print('AppDirs.create_dirs ignorado (root, os diretórios seriam os do sistema).')
+        return
+    home = os.environ['HOME']
+    for count in APPS:
+        apps = [AppDirs(appname=f'bench_app_{n}') for n in range(count)]
+        if hasattr(AppDirs, 'create_many'):
+            create_all = lambda: AppDirs.create_many(apps)
+        else:
+            create_all = lambda: [app.create_dirs() for app in apps]
+
+        def _create_empty() -> float:
+            shutil.rmtree(home)
+            os.mkdir(home)
+            start = time.perf_counter()
+            create_all()
+            return time.perf_counter() - start
+
+        suite.add('AppDirs.create_dirs', min(_create_empty() for _ in range(suite.repeat)), apps=count, tree='empty')
+        # Árvore grande já existente (outros aplicativos em ~/.config e ~/.cache).
+        make_dir_tree(os.path.join(home, '.config'), 2000, files_per_dir=1)
+        make_dir_tree(os.path.join(home, '.cache'), 2000)
+        suite.run('AppDirs.create_dirs', create_all, apps=count, tree='existing')
+        suite.run('AppDirs.create_dirs', apps[0].create_dirs, apps=1, tree='existing')
+
+
+def bench_add_home_in_path(suite: Suite, max_size: int) -> None:
+    from apps_conf import ConfDirs, KERNEL_TYPE
+
+    if KERNEL_TYPE != 'Linux':
+        return
+    if os.geteuid() == 0:
+        print('add_home_in_path ignorado (root).')
+        return
+    from apps_conf import add_home_in_path
+
+    bashrc = ConfDirs().fileBashRc()
+    if os.path.isdir(bashrc):
+        # Versões antigas de create_dirs() criam também as entradas FILE_* como diretórios.
+        shutil.rmtree(bashrc)
+    dir_bin = ConfDirs().dirBin()
+    os.environ['PATH'] = ':'.join(p for p in os.environ.get('PATH', '').split(':') if p != dir_bin)
+    for size in [s for s in RC_SIZES if s <= min(max_size, 16 * 1024 * 1024)]:
+        original = make_text_file(os.path.join(suite.tmp, 'bashrc'), size)
+        times = []
+        for _ in range(suite.repeat):
+            shutil.copyfile(original, bashrc)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                add_home_in_path()
+                times.append(time.perf_counter() - start)
+        suite.add('add_home_in_path', min(times), size=size)
+        # Arquivo já configurado.
+        def _configured() -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                add_home_in_path()
+        suite.run('add_home_in_path', _configured, size=size, configured=True)
+        os.remove(original)
+
+
+def _result_key(result: dict) -> tuple:
+    return (result['name'], json.dumps(result['params'], sort_keys=True))
+
+
+def compare(results: list, baseline_file: str) -> None:
+    """Mostra a razão (tempo atual / tempo de baseline_file) de cada teste."""
+    with open(baseline_file) as file:
+        baseline = {_result_key(r): r['seconds'] for r in json.load(file)['results']}
+    print(f'\nComparação com {baseline_file} (< 1.00 = mais rápido):')
+    for result in results:
+        before = baseline.get(_result_key(result))
+        if before:
+            print(f'{result["name"]:<28} {result["params"]!s:<60} {result["seconds"] / before:6.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-size', default='16M', help='Maior arquivo (ex: 64K, 16M, 1G), padrão 16M.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Gravar os resultados em um arquivo JSON.')
+    parser.add_argument('--compare', help='Comparar com um arquivo gerado por --output.')
+    parser.add_argument(
+        '--package-dir', help='Diretório que contém o pacote apps_conf a medir, padrão: este projeto.'
+    )
+    parser.add_argument(
+        '--only', action='append', choices=('reader', 'json', 'dirs', 'path'), help='Executar apenas estes grupos.'
+    )
+    args = parser.parse_args()
+    max_size = parse_size(args.max_size)
+    groups = args.only or ('reader', 'json', 'dirs', 'path')
+    if args.package_dir:
+        sys.path.insert(0, os.path.abspath(args.package_dir))
+
+    with tempfile.TemporaryDirectory(prefix='apps-conf-bench-') as tmp:
+        # HOME temporária, definida antes de importar apps_conf.
+        home = os.path.join(tmp, 'home')
+        os.mkdir(home)
+        os.environ['HOME'] = home
+        import apps_conf
+
+        print(f'apps_conf {apps_conf.__version__} ({os.path.dirname(apps_conf.__file__)})')
+        data = os.path.join(tmp, 'data')
+        os.mkdir(data)
+
+        suite = Suite(repeat=args.repeat, tmp=data)
+        if 'reader' in groups:
+            bench_file_reader(suite, max_size)
+        if 'json' in groups:
+            bench_file_json(suite, max_size)
+        if 'dirs' in groups:
+            bench_dirs(suite)
+        if 'path' in groups:
+            bench_add_home_in_path(suite, max_size)
+
+    output = {
+        'meta': {
+            'apps_conf': apps_conf.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'argv': sys.argv[1:],
+        },
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=4)
+        print(f'\nResultados gravados em {args.output}')
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
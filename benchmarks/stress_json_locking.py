@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Teste de carga de FileJson com vários processos alterando o mesmo arquivo.
+
+   Cada processo incrementa o contador de uma chave própria e um contador
+compartilhado (transaction()). Com locking=True nenhuma alteração pode ser
+perdida, o resultado é conferido no fim, junto com o número de alterações
+por segundo.
+
+   python benchmarks/stress_json_locking.py [--procs N] [--updates N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import _common  # Adiciona a raiz do projeto no sys.path.
+from apps_conf import FileJson, FilePath
+
+
+def worker(path: str, worker_id: int, updates: int, options: dict) -> None:
+    file_json = FileJson(FilePath(path), **options)
+    for _ in range(updates):
+        with file_json.transaction() as content:
+            content['total'] = content.get('total', 0) + 1
+            content[f'worker_{worker_id}'] = content.get(f'worker_{worker_id}', 0) + 1
+        # Leituras concorrentes não podem ver um arquivo incompleto.
+        if file_json.lines_to_dict() == {}:
+            raise SystemExit(f'worker {worker_id}: leitura vazia')
+
+
+def run(procs: int, updates: int, options: dict) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'config.json')
+        FileJson(FilePath(path)).write_lines({'total': 0})
+
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=worker, args=(path, n, updates, options)) for n in range(procs)
+        ]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        content = FileJson(FilePath(path), journal=options.get('journal', False)).lines_to_dict()
+        ok = (content.get('total') == procs * updates) and \
+            all(content.get(f'worker_{n}') == updates for n in range(procs)) and \
+            all(p.exitcode == 0 for p in workers)
+        return ok, content.get('total'), procs * updates / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--procs', type=int, default=8)
+    parser.add_argument('--updates', type=int, default=200)
+    args = parser.parse_args()
+
+    cases = (
+        ('sem trava', {}),
+        ('locking', {'locking': True}),
+        ('locking + journal', {'locking': True, 'journal': True, 'journal_max_records': 100}),
+    )
+    failed = False
+    for name, options in cases:
+        ok, total, rate = run(args.procs, args.updates, options)
+        print(f'{name:<18} total={total}/{args.procs * args.updates} {"OK " if ok else "ERRO"} {rate:9.1f} alterações/s')
+        failed = failed or ((not ok) and options.get('locking', False))
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
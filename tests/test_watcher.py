@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+#
+
+"""
+   Testes de watcher.FileWatcher (inotify e polling) e de FileJson.watch(),
+com arquivos temporários.
+
+   python -m pytest tests/   ou   python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps_conf import FileJson, FilePath, FileWatcher
+
+
+def replace_file(path: str, data: str) -> None:
+    """Grava path como write_file_atomic(): arquivo temporário + os.replace()."""
+    with open(path + '.tmp', 'w') as file:
+        file.write(data)
+    os.replace(path + '.tmp', path)
+
+
+class _WatcherTests(object):
+    use_inotify: bool = True
+
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.app_dir = os.path.join(self.dir, 'app')
+        os.mkdir(self.app_dir)
+        self.path = os.path.join(self.app_dir, 'config.json')
+        replace_file(self.path, '{}')
+        self.watcher = FileWatcher(use_inotify=self.use_inotify, interval=0.05)
+        if self.use_inotify and (self.watcher.backend != 'inotify'):
+            self.watcher.close()
+            self.skipTest('inotify não disponível')
+        self.calls = []
+
+    def tearDown(self) -> None:
+        self.watcher.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def wait_changed(self, path: str, timeout: float=3.0) -> bool:
+        """Executa check() até path ser alterado (True) ou até timeout segundos (False)."""
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if path in self.watcher.check(0.05):
+                return True
+        return False
+
+    def test_replace(self) -> None:
+        self.watcher.watch(self.path, self.calls.append)
+        replace_file(self.path, '{"a": 1}')
+        self.assertTrue(self.wait_changed(self.path))
+        self.assertEqual(self.calls[-1], self.path)
+
+    def test_directory_removed_and_recreated(self) -> None:
+        self.watcher.watch(self.path, self.calls.append)
+        shutil.rmtree(self.app_dir)
+        self.assertTrue(self.wait_changed(self.path))
+
+        os.mkdir(self.app_dir)
+        replace_file(self.path, '{"a": 2}')
+        self.assertTrue(self.wait_changed(self.path))
+
+        # Depois de recriado o diretório continua sendo monitorado.
+        self.calls.clear()
+        replace_file(self.path, '{"a": 3}')
+        self.assertTrue(self.wait_changed(self.path))
+        self.assertEqual(self.calls, [self.path])
+
+    def test_unwatch(self) -> None:
+        self.watcher.watch(self.path, self.calls.append)
+        self.watcher.unwatch(self.path, self.calls.append)
+        replace_file(self.path, '{"a": 1}')
+        self.assertFalse(self.wait_changed(self.path, timeout=0.5))
+        self.assertEqual(self.calls, [])
+
+    def test_file_json_watch_invalidates_cache(self) -> None:
+        file_json = FileJson(FilePath(self.path))
+        changed = []
+        file_json.watch(changed.append, watcher=self.watcher)
+        self.assertIsNone(file_json.get_value('a'))
+
+        # Alteração feita por outra instância (outro processo).
+        FileJson(FilePath(self.path)).write_lines({'a': 1})
+        self.assertTrue(self.wait_changed(self.path))
+        self.assertEqual(changed[-1], file_json)
+        self.assertIsNone(file_json._cache)
+        self.assertEqual(file_json.get_value('a'), 1)
+        file_json.unwatch()
+
+    def test_file_json_journal_watch_race(self) -> None:
+        # O watcher (em uma thread) descarta o cache enquanto update_key() grava
+        # o journal, nenhuma alteração pode falhar ou ser perdida.
+        file_json = FileJson(
+            FilePath(self.path), journal=True, journal_max_records=10 ** 9, journal_max_bytes=10 ** 12
+        )
+        file_json.watch(watcher=self.watcher)
+        self.watcher.start()
+        try:
+            for n in range(1000):
+                file_json.is_key('x')
+                file_json.update_key(f'key_{n % 20}', n)
+        finally:
+            self.watcher.stop()
+            file_json.unwatch()
+        content = FileJson(FilePath(self.path), journal=True).lines_to_dict()
+        self.assertEqual(content, {f'key_{n}': 980 + n for n in range(20)})
+
+
+class InotifyWatcherTests(_WatcherTests, unittest.TestCase):
+    use_inotify = True
+
+
+class PollingWatcherTests(_WatcherTests, unittest.TestCase):
+    use_inotify = False
+
+
+if __name__ == '__main__':
+    unittest.main()